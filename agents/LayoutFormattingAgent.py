@@ -2,30 +2,22 @@
 LayoutFormattingAgent module
 """
 
+from agents._metadata import make_mixin
 from pamphlet_agent import LayoutFormattingAgent as _CoreLayoutFormattingAgent
 
 
-class _AgentMetadataMixin:
-    """Provides a small manifest for observability dashboards."""
-
-    manifest = {
-        "name": "LayoutFormattingAgent",
-        "role": "layout_renderer",
-        "responsibilities": [
+class LayoutFormattingAgent(
+    make_mixin(
+        "LayoutFormattingAgent",
+        "layout_renderer",
+        [
             "place text over background",
             "respect panel visibility flags",
             "coordinate with PamphletDesigner",
         ],
-    }
-
-    def metadata(self):
-        return dict(self.manifest)
-
-    def __repr__(self) -> str:  # pragma: no cover - cosmetic
-        return f"<{self.manifest.get('name', self.__class__.__name__)} ready>"
-
-
-class LayoutFormattingAgent(_AgentMetadataMixin, _CoreLayoutFormattingAgent):
+    ),
+    _CoreLayoutFormattingAgent,
+):
     """
     Agent responsible for applying clean UI formatting:
     - positioning headline, body, features, and CTA
@@ -36,5 +28,3 @@ class LayoutFormattingAgent(_AgentMetadataMixin, _CoreLayoutFormattingAgent):
     """
 
     pass
-
-
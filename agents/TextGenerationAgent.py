@@ -9,37 +9,36 @@ The core implementation lives in `pamphlet_agent.py` and is re-exported here
 so there is a single source of truth and no duplication of logic.
 """
 
-from pamphlet_agent import TextGenerationAgent as _CoreTextGenerationAgent
+from types import MappingProxyType
+from typing import Any, Mapping
 
+from agents._metadata import make_mixin
+from pamphlet_agent import TextGenerationAgent as _CoreTextGenerationAgent
 
-class _AgentMetadataMixin:
-    """Minimal manifest for dashboards or debugging overlays."""
 
-    manifest = {
-        "name": "TextGenerationAgent",
-        "role": "content_author",
-        "responsibilities": [
+class TextGenerationAgent(
+    make_mixin(
+        "TextGenerationAgent",
+        "content_author",
+        [
             "headline",
             "description",
             "cta",
             "tagline",
         ],
-    }
-
-    def metadata(self):
-        return dict(self.manifest)
-
-    def __repr__(self) -> str: 
-        return f"<{self.manifest.get('name', self.__class__.__name__)} ready>"
-
-
-class TextGenerationAgent(_AgentMetadataMixin, _CoreTextGenerationAgent):
+    ),
+    _CoreTextGenerationAgent,
+):
     """
     High-level agent responsible for generating structured pamphlet copy
     (headline, description, CTA, tagline) using Ollama via `OllamaTextGenerator`.
     """
 
     # Inherit all behavior from the core implementation.
-    pass
-
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # The model is chosen per instance (OLLAMA_MODEL), so freeze a
+        # per-instance manifest that includes it once; the inherited
+        # `metadata()` then returns this same object on every call
+        self.manifest: Mapping[str, Any] = MappingProxyType({**type(self).manifest, "model": self.text_backend.model})
@@ -0,0 +1,35 @@
+"""
+Shared metadata mixin for the agent wrappers
+============================================
+
+Every wrapper in this package exposes the same small manifest (name, role,
+responsibilities) for UI/debug panels. `make_mixin` builds the per-agent
+mixin so the helpers are defined once instead of in every module.
+"""
+
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+
+class _AgentMetadataBase:
+    """Lightweight metadata/introspection helpers for UI/debug panels."""
+
+    __slots__ = ()
+    manifest: Mapping[str, Any] = MappingProxyType({})
+
+    def metadata(self) -> Mapping[str, Any]:
+        # The manifest is frozen at class creation, so it can be returned as-is
+        return self.manifest
+
+    def __repr__(self) -> str:  # pragma: no cover - cosmetic
+        return f"<{self.manifest.get('name', self.__class__.__name__)} ready>"
+
+
+def make_mixin(name: str, role: str, responsibilities: Iterable[str]) -> type:
+    """Return an `_AgentMetadataMixin` class carrying the manifest for one agent."""
+    manifest = MappingProxyType({
+        "name": name,
+        "role": role,
+        "responsibilities": tuple(responsibilities),
+    })
+    return type("_AgentMetadataMixin", (_AgentMetadataBase,), {"__slots__": (), "manifest": manifest})
@@ -4,26 +4,102 @@ Flask Web Application for AI Pamphlet Generator
 """
 
 from flask import Flask, render_template, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.utils import secure_filename
+import atexit
+import dataclasses
+import diskcache
+import functools
+import hashlib
+import io
 import os
-import base64
-from pamphlet_agent import PamphletAgent, PamphletRequest
+import pathlib
+import uuid
+import PIL
+from pamphlet_agent import PamphletAgent, PamphletRequest, BatchedTextGenerator, _LRUCache
+from utils.b64 import b64decode, b64encode_str
 import json
 
+try:  # Optional speedup for the multi-MB base64 JSON responses
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (Rust) instead of the stdlib encoder."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    # Every jsonify()/request.get_json() call goes through orjson
+    app.json = ORJSONProvider(app)
 
 
-STABILITY_API_KEY = "sk-yOveJUr42rXpmcP9577FZtprJk5guzQW8CN7Ofq4FQQZdFzR"
+STABILITY_API_KEY = os.environ.get("STABILITY_API_KEY", "your_stability_api_key_here")
 
 if STABILITY_API_KEY == "your_stability_api_key_here":
-    print("⚠️  WARNING: Please set your Stability AI API key in app.py")
+    print("⚠️  WARNING: Please set the STABILITY_API_KEY environment variable")
     print("   Get your free API key from: https://platform.stability.ai/")
-    print("   Then update STABILITY_API_KEY in app.py")
+    print("   Then run: export STABILITY_API_KEY=sk-your-key")
 else:
     print("✅ Stability AI API key is set!")
 
-# Use the full pamphlet agent with image generation
-from pamphlet_agent import PamphletAgent
-agent = PamphletAgent(STABILITY_API_KEY)
+# Ollama's default `llama3.2` tag is the 3B instruct model quantized to
+# Q4_K_M, which is plenty for four short strings; set OLLAMA_MODEL to e.g.
+# `llama3.2:3b-instruct-q8_0` to trade speed for slightly better copy
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2")
+
+
+@functools.cache
+def get_agent() -> PamphletAgent:
+    """Build the full pamphlet agent (with image generation) once per process."""
+    # Concurrent /generate requests share one coalescing Ollama backend
+    agent = PamphletAgent(STABILITY_API_KEY, text_backend=BatchedTextGenerator(OLLAMA_MODEL))
+    atexit.register(agent.close)
+
+    # Load the Ollama model before serving traffic so the first user skips the cold start
+    if agent.text_agent is not None and agent.text_agent.warmup():
+        print(f"🔥 Ollama model preloaded: {OLLAMA_MODEL}")
+    return agent
+
+
+# Build eagerly so the agent exists before the first request (and is shared
+# copy-on-write by pre-forked workers)
+get_agent()
+
+REQUIRED_FIELDS = frozenset({
+    'product_name', 'description', 'tone', 'target_audience', 'key_features', 'call_to_action',
+})
+
+# Finished pamphlets survive restarts and are shared by all workers, so repeat
+# submissions skip both Ollama and Stability AI
+pamphlet_cache = diskcache.Cache('./.pamphlet_cache', size_limit=2**30)
+PAMPHLET_CACHE_TTL = 24 * 60 * 60
+
+
+def pamphlet_cache_key(pamphlet_request: PamphletRequest) -> str:
+    """Stable hash of every field of the request."""
+    canonical = json.dumps(dataclasses.asdict(pamphlet_request), sort_keys=True)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+# Every generated/edited pamphlet lands in one directory, created once at startup
+OUT = pathlib.Path('./outputs').resolve()
+OUT.mkdir(exist_ok=True)
+
+# Recently rendered images keyed by filename, so downloads don't need a disk copy
+recent_images = _LRUCache(maxsize=32)
 
 @app.route('/')
 def index():
@@ -36,11 +112,10 @@ def generate_pamphlet():
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['product_name', 'description', 'tone', 'target_audience', 'key_features', 'call_to_action']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        # Validate required fields (reports every missing field at once)
+        missing = REQUIRED_FIELDS - data.keys()
+        if missing:
+            return jsonify({'error': f"Missing required fields: {', '.join(sorted(missing))}"}), 400
         
         # Create pamphlet request
         pamphlet_request = PamphletRequest(
@@ -58,16 +133,41 @@ def generate_pamphlet():
             regeneration_index=int(data.get('regeneration_count', 0) or 0)
         )
         
-        # Generate pamphlet
-        result = agent.generate_pamphlet(pamphlet_request)
+        cache_key = pamphlet_cache_key(pamphlet_request)
+        result = pamphlet_cache.get(cache_key)
+        if result is None:
+            agent = get_agent()
+            
+            # Reuse copy from an identical earlier request so Ollama is skipped entirely
+            cached_text = agent.text_agent.cached(pamphlet_request) if agent.text_agent else None
+            
+            # Generate pamphlet
+            result = agent.generate_pamphlet(
+                pamphlet_request,
+                precomputed_text=cached_text,
+                persist=bool(data.get('persist', True)),
+                output_dir=str(OUT),
+                filename=f'pamphlet_{uuid.uuid4().hex}.png',
+                # /download serves recent renders from memory, so the disk copy
+                # needn't hold up the response
+                background_save=True,
+            )
+            # Placeholder copy from an Ollama outage must not be pinned in the
+            # shared on-disk cache for a day
+            if result.get('success') and not result.get('text_fallback'):
+                pamphlet_cache.set(
+                    cache_key,
+                    {key: result[key] for key in ('success', 'image_bytes', 'layout_base_image', 'text_content', 'filename', 'message')},
+                    expire=PAMPHLET_CACHE_TTL,
+                )
         
         if result.get('success'):
-            # Read the generated image file and encode as base64
-            with open(result['filename'], 'rb') as f:
-                image_data = f.read()
+            # Use the rendered bytes directly instead of re-reading the file
+            image_data = result['image_bytes']
+            recent_images.put(result['filename'], image_data)
             
             # Convert to base64 for web display
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
+            image_base64 = b64encode_str(image_data)
             
             return jsonify({
                 'success': True,
@@ -86,8 +186,14 @@ def generate_pamphlet():
 @app.route('/download/<filename>')
 def download_pamphlet(filename):
     """Download generated pamphlet"""
+    filename = secure_filename(filename)
+    if not filename:
+        return jsonify({'error': 'File not found'}), 404
+    image_data = recent_images.get(filename)
+    if image_data is not None:
+        return send_file(io.BytesIO(image_data), mimetype='image/png', as_attachment=True, download_name=filename)
     try:
-        return send_file(filename, as_attachment=True)
+        return send_file(OUT / filename, as_attachment=True)
     except FileNotFoundError:
         return jsonify({'error': 'File not found'}), 404
 
@@ -102,24 +208,26 @@ def edit_pamphlet():
             return jsonify({'error': 'Missing required fields: originalImage and edits'}), 400
         
         # Decode the original image
-        original_image_data = base64.b64decode(data['originalImage'])
+        original_image_data = b64decode(data['originalImage'])
         
         # Get edit settings
         edits = data['edits']
         
         # Create edited pamphlet
-        edited_result = agent.edit_pamphlet(original_image_data, edits, data.get('textContent'))
+        edited_result = get_agent().edit_pamphlet(original_image_data, edits, data.get('textContent'))
         
         if edited_result:
             edited_image_data, layout_base_data = edited_result
-            # Save edited pamphlet
-            filename = f"edited_{data.get('filename', 'pamphlet')}"
-            with open(filename, 'wb') as f:
-                f.write(edited_image_data)
+            # Keep the edited pamphlet in memory for /download; disk copy is optional
+            filename = f'edited_{uuid.uuid4().hex}.png'
+            recent_images.put(filename, edited_image_data)
+            if data.get('persist', True):
+                with open(OUT / filename, 'wb') as f:
+                    f.write(edited_image_data)
             
             # Convert to base64 for response
-            edited_image_base64 = base64.b64encode(edited_image_data).decode('utf-8')
-            layout_base_base64 = base64.b64encode(layout_base_data).decode('utf-8')
+            edited_image_base64 = b64encode_str(edited_image_data)
+            layout_base_base64 = b64encode_str(layout_base_data)
             
             return jsonify({
                 'success': True,
@@ -144,9 +252,20 @@ if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
     
+    port = int(os.getenv('PORT', 5002))
     print("🚀 Starting AI Pamphlet Generator...")
-    print("📱 Open your browser and go to: http://localhost:5002")
+    print(f"📱 Open your browser and go to: http://localhost:{port}")
     print("🤖 Make sure Ollama is running on http://localhost:11434")
-    print("🎨 Make sure you have set your Stability AI API key in app.py")
+    print("   Tip: start it with OLLAMA_NUM_PARALLEL=4 so the 4 copy prompts run in parallel")
+    print("   and OLLAMA_KEEP_ALIVE=1h so the model stays loaded between requests")
+    print("🎨 Make sure you have set the STABILITY_API_KEY environment variable")
+    print("🏭 This is the development server; in production run: gunicorn -c gunicorn.conf.py app:app")
+    # Pillow-SIMD releases carry a ".postN" suffix (e.g. 9.5.0.post1)
+    if ".post" in PIL.__version__:
+        print(f"🖼️  Pillow-SIMD {PIL.__version__} detected (SIMD compositing/resizing)")
+    else:
+        print(f"🖼️  Pillow {PIL.__version__}; install pillow-simd on AVX2 CPUs for faster rendering")
     
-    app.run(debug=True, host='0.0.0.0', port=5002)
+    # The reloader/debugger re-imports the agent and slows every request, so it is opt-in.
+    # threaded=True lets concurrent users overlap their Ollama/Stability I/O.
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=port, threaded=True)
@@ -80,11 +80,11 @@ def main():
     print_banner()
     
     # Check if API key is set
-    api_key = "your_stability_api_key_here"  # This should be updated
+    api_key = os.environ.get("STABILITY_API_KEY", "your_stability_api_key_here")
     
     if api_key == "your_stability_api_key_here":
         print("\n⚠️  WARNING: Stability AI API key not set!")
-        print("Please update the API key in this script or in app.py")
+        print("Please set the STABILITY_API_KEY environment variable")
         print("You can get a free API key from: https://platform.stability.ai/")
         
         use_demo = input("\nContinue with demo (text generation only)? (y/n): ").lower()
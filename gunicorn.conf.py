@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for the AI Pamphlet Generator
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5002')}"
+
+# Pamphlet generation is I/O-bound (Ollama + Stability AI), so threaded
+# workers keep many requests in flight per process.
+workers = 2 * multiprocessing.cpu_count() + 1
+worker_class = "gthread"
+threads = 8
+
+# Import app.py (and build the PamphletAgent) once in the master; workers
+# inherit it copy-on-write.
+preload_app = True
+
+# A full generate round-trip can take well over Gunicorn's 30s default.
+timeout = 180
+
+
+def post_fork(server, worker):
+    """Drop HTTP and SQLite connections inherited from the master process."""
+    from app import get_agent, pamphlet_cache
+
+    get_agent().reset_connections()
+    pamphlet_cache.close()
@@ -4,15 +4,42 @@ AI Agent for Pamphlet Generation
 Combines Ollama text generation with Stable Diffusion image generation
 """
 
+import asyncio
+import functools
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-import base64
 import random
-from typing import Any, Dict, List, Optional, Tuple
-from dataclasses import dataclass
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageFilter, ImageOps
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, replace
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
 import io
+import hashlib
+import importlib.util
 import os
+import atexit
+import pickle
+
+import numpy as np
+
+from utils.b64 import b64decode, b64encode_str
+
+# Optional extras are probed here but only imported on first use: numba
+# (JIT pixel kernels for the edit filters), OpenCV (opt-in edit filters) and
+# faiss + sentence-transformers (semantic text cache) each add noticeable
+# time to a cold import.
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+HAS_OPENCV = importlib.util.find_spec("cv2") is not None
+HAS_SEMANTIC_DEPS = (
+    importlib.util.find_spec("faiss") is not None
+    and importlib.util.find_spec("sentence_transformers") is not None
+)
 
 @dataclass
 class PamphletRequest:
@@ -69,12 +96,363 @@ IMAGE_VARIATION_HINTS: List[str] = [
     "Highlight natural textures with gentle shadows and a clean negative space band suitable for body copy."
 ]
 
+# Both tables have a power-of-two length, so regeneration_index is mapped to
+# an entry with a mask instead of a modulo (same result, negatives included)
+assert len(VARIATION_PROFILES) & (len(VARIATION_PROFILES) - 1) == 0 and VARIATION_PROFILES
+assert len(IMAGE_VARIATION_HINTS) & (len(IMAGE_VARIATION_HINTS) - 1) == 0 and IMAGE_VARIATION_HINTS
+_VP_MASK = len(VARIATION_PROFILES) - 1
+_IMG_HINT_MASK = len(IMAGE_VARIATION_HINTS) - 1
+
+
+# Copy prompts, filled with str.format_map once per request. Variation slots
+# are empty strings on the first generation, so those prompts stay
+# byte-identical across calls (and hit Ollama's prompt-prefix cache).
+HEADLINE_TMPL = """
+Create a compelling, attention-grabbing headline for a pamphlet about: {product_name}
+Description: {description}
+Tone: {tone}
+Target audience: {target_audience}
+{headline_directive}
+
+The headline should be:
+- 3-6 words maximum (for pamphlet layout)
+- {tone} in tone
+- Bold and impactful
+- Perfect for {target_audience}
+- Eye-catching and memorable
+{headline_fresh}
+
+Return only the headline, no quotes or additional text.{variation_suffix}
+"""
+
+DESCRIPTION_TMPL = """
+Write a concise, persuasive description for a pamphlet about: {product_name}
+
+Original description: {description}
+Key features: {features_csv}
+Tone: {tone}
+Target audience: {target_audience}
+Style: {style}
+{description_directive}
+
+The description should be:
+- 1-2 short paragraphs (max 3-4 sentences total)
+- {tone} and {style}
+- Highlight key benefits, not just features
+- Perfect for pamphlet layout
+- Appeal to {target_audience}
+- Easy to read and scan
+{description_fresh}
+
+Return only the description text.{variation_suffix}
+"""
+
+CTA_TMPL = """
+Create a compelling call-to-action for a pamphlet about: {product_name}
+
+Original CTA: {call_to_action}
+Tone: {tone}
+Target audience: {target_audience}
+{cta_directive}
+
+The CTA should be:
+- 1 short sentence (max 8-10 words)
+- Action-oriented and urgent
+- {tone} in tone
+- Perfect for pamphlet button or banner
+- Clear and specific
+{cta_fresh}
+
+Return only the call-to-action text.{variation_suffix}
+"""
+
+TAGLINE_TMPL = """
+Create a memorable tagline for: {product_name}
+
+Description: {description}
+Tone: {tone}
+Target audience: {target_audience}
+{tagline_directive}
+
+The tagline should be:
+- 2-4 words maximum
+- Memorable and catchy
+- {tone} in tone
+- Perfect for pamphlet subheading
+- Capture the essence of the product
+{tagline_fresh}
+
+Return only the tagline.{variation_suffix}
+"""
+
+# Fixed slots for regenerations; the per-profile directives are added on top
+_VARIATION_SLOTS: Dict[str, str] = {
+    "headline_fresh": "- Deliver a fresh phrasing that differs from prior versions",
+    "description_fresh": "- Present a noticeably different angle than previous drafts",
+    "cta_fresh": "- Provide an alternate framing versus previous CTAs",
+    "tagline_fresh": "- Offer a distinctly new phrasing",
+    "variation_suffix": "\nPlease ensure this version feels distinct from any previous iterations while staying on-brand.",
+}
+_NO_VARIATION_SLOTS: Dict[str, str] = dict.fromkeys(
+    [*_VARIATION_SLOTS, "headline_directive", "description_directive", "cta_directive", "tagline_directive"], ""
+)
+
+# Short fields are streamed and cut off early: (max_words, num_predict).
+# The word caps leave a little slack over what each prompt asks for, so
+# compliant answers are never clipped; the description is never truncated.
+STREAM_LIMITS: Dict[str, Tuple[int, int]] = {
+    "headline": (8, 24),
+    "call_to_action": (12, 32),
+    "tagline": (6, 16),
+}
+
+
+class _LRUCache:
+    """Small thread-safe LRU mapping shared by the in-process caches below."""
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticTextCache:
+    """
+    Embedding-backed cache so rephrased but equivalent requests
+    ("health-conscious families" vs "families who care about health")
+    reuse previously generated copy instead of calling Ollama again.
+
+    Requires `faiss` and `sentence-transformers`; without them (or if the
+    embedding model cannot be loaded) every lookup is simply a miss.
+    """
+
+    dimension = 384
+
+    def __init__(
+        self,
+        index_path: str = "semantic_cache.faiss",
+        results_path: str = "semantic_cache.pkl",
+        threshold: float = 0.92,
+        model_name: str = "all-MiniLM-L6-v2",
+    ) -> None:
+        self.index_path = index_path
+        self.results_path = results_path
+        self.threshold = threshold
+        self.model_name = model_name
+        self.enabled = HAS_SEMANTIC_DEPS
+        self._faiss = None
+        self._model = None
+        self._index = None
+        self._results: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_text(request: PamphletRequest) -> str:
+        return (
+            f"{request.product_name}|{request.description}|{request.tone}|"
+            f"{request.target_audience}|{','.join(request.key_features)}|{request.call_to_action}"
+        )
+
+    def _ensure_loaded(self) -> bool:
+        if self._index is not None:
+            return True
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+
+            self._faiss = faiss
+            self._model = SentenceTransformer(self.model_name)
+            if os.path.exists(self.index_path) and os.path.exists(self.results_path):
+                self._index = faiss.read_index(self.index_path)
+                with open(self.results_path, "rb") as f:
+                    self._results = pickle.load(f)
+            else:
+                self._index = faiss.IndexFlatIP(self.dimension)
+            atexit.register(self.save)
+            return True
+        except Exception as e:
+            print(f"Semantic cache disabled: {e}")
+            self.enabled = False
+            return False
+
+    def embed(self, request: PamphletRequest) -> Optional["np.ndarray"]:
+        """Return an L2-normalised embedding of the request, or None if disabled."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if not self._ensure_loaded():
+                return None
+            vector = self._model.encode([self.key_text(request)], normalize_embeddings=True)
+        return np.asarray(vector, dtype="float32")
+
+    def lookup(self, vector: "np.ndarray") -> Optional[Dict[str, str]]:
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector, 1)
+            if scores[0][0] >= self.threshold:
+                return dict(self._results[ids[0][0]])
+        return None
+
+    def add(self, vector: "np.ndarray", text_content: Dict[str, str]) -> None:
+        with self._lock:
+            if self._index is None:
+                return
+            self._index.add(vector)
+            self._results.append(dict(text_content))
+
+    def save(self) -> None:
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return
+            try:
+                self._faiss.write_index(self._index, self.index_path)
+                with open(self.results_path, "wb") as f:
+                    pickle.dump(self._results, f)
+            except Exception as e:
+                print(f"Error saving semantic cache: {e}")
+
+
+# One process-wide instance so every TextGenerationAgent shares the same index.
+SHARED_SEMANTIC_CACHE = SemanticTextCache()
+
+
+OLLAMA_DISK_CACHE_TTL = 24 * 60 * 60
+
+
+@functools.lru_cache(maxsize=1)
+def _ollama_disk_cache():
+    """On-disk store for deterministic Ollama completions, opened on first use."""
+    import diskcache
+
+    return diskcache.Cache("./.ollama_cache", size_limit=2**28)
+
+
+def _pooled_session(prefix: str, pool_size: int = 10) -> requests.Session:
+    """
+    requests.Session with a keep-alive connection pool mounted on `prefix`.
+
+    Only connection failures are retried: urllib3 does not replay POST
+    bodies that were already sent, so paid image calls are never duplicated.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    )
+    session.mount(prefix, adapter)
+    return session
+
+
+class _BackgroundLoop:
+    """
+    Event loop running forever in a daemon thread.
+
+    Lets synchronous callers share long-lived async resources (an
+    httpx.AsyncClient and its keep-alive connections), which `asyncio.run`
+    can't do because it creates and closes a fresh loop per call. The thread
+    is started lazily and restarted if it is gone, e.g. in a forked worker.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def run(self, coro: Any) -> Any:
+        """Run `coro` on the background loop and block until it finishes."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def stop(self) -> None:
+        """Stop and close the loop; a later `run` starts a new one."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if thread is not None and thread.is_alive():
+            # Finalise async generators left suspended (e.g. `aiter_lines()`
+            # after a stream stops early), or they are reported as pending
+            # tasks destroyed at shutdown
+            asyncio.run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop).result()
+            # Also joins the resolver threads httpx's DNS lookups ran on
+            asyncio.run_coroutine_threadsafe(loop.shutdown_default_executor(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
 class OllamaTextGenerator:
     """Low-level helper that talks to the Ollama HTTP API."""
     
-    def __init__(self, model: str = "llama3.2", base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        model: str = "llama3.2",
+        base_url: str = "http://localhost:11434",
+        keep_alive: str = "1h",
+        prompt_cache_size: int = 1024,
+    ):
         self.model = model
         self.base_url = base_url
+        # How long Ollama keeps the model resident after each call
+        self.keep_alive = keep_alive
+        # Sized for the 4 concurrent copy prompts of two overlapping pamphlets
+        self.session = _pooled_session("http://", pool_size=8)
+        # The async client lives on one background loop so its connections
+        # are reused across pamphlets instead of reopened per request
+        self._loop = _BackgroundLoop("ollama-async")
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aclient_thread: Optional[threading.Thread] = None
+        # Each field's prompt only mentions the request fields it depends on,
+        # so an edit to e.g. the CTA still reuses the other three completions
+        self._prompt_cache = _LRUCache(prompt_cache_size)
+
+    def _payload(self, prompt: str, **extra: Any) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            **extra,
+        }
+
+    def warmup(self) -> bool:
+        """Load the model into memory ahead of the first real request."""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(" ", options={"num_predict": 1}),
+                timeout=120
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Error warming up Ollama: {e}")
+            return False
     
     def generate_pamphlet_text(self, request: PamphletRequest) -> Dict[str, str]:
         """
@@ -83,118 +461,126 @@ class OllamaTextGenerator:
         This is intentionally a focused, single-responsibility helper used by
         TextGenerationAgent so higher-level orchestration stays clean.
         """
-
-        profile = VARIATION_PROFILES[request.regeneration_index % len(VARIATION_PROFILES)] if VARIATION_PROFILES else {}
-        is_variation = request.regeneration_index > 0
-        variation_suffix = "\nPlease ensure this version feels distinct from any previous iterations while staying on-brand."
-        
-        # Generate compelling headline
-        headline_prompt = f"""
-        Create a compelling, attention-grabbing headline for a pamphlet about: {request.product_name}
-        Description: {request.description}
-        Tone: {request.tone}
-        Target audience: {request.target_audience}
-        {"Additional directive: " + profile.get("headline_hint", "") if is_variation else ""}
-        
-        The headline should be:
-        - 3-6 words maximum (for pamphlet layout)
-        - {request.tone} in tone
-        - Bold and impactful
-        - Perfect for {request.target_audience}
-        - Eye-catching and memorable
-        {"- Deliver a fresh phrasing that differs from prior versions" if is_variation else ""}
-        
-        Return only the headline, no quotes or additional text.{variation_suffix if is_variation else ""}
-        """
-        
-        headline = self._call_ollama(headline_prompt) or request.product_name
-        
-        # Generate short, punchy description for pamphlet
-        description_prompt = f"""
-        Write a concise, persuasive description for a pamphlet about: {request.product_name}
-        
-        Original description: {request.description}
-        Key features: {', '.join(request.key_features)}
-        Tone: {request.tone}
-        Target audience: {request.target_audience}
-        Style: {request.style}
-        {"Variation directive: " + profile.get("description_hint", "") if is_variation else ""}
-        
-        The description should be:
-        - 1-2 short paragraphs (max 3-4 sentences total)
-        - {request.tone} and {request.style}
-        - Highlight key benefits, not just features
-        - Perfect for pamphlet layout
-        - Appeal to {request.target_audience}
-        - Easy to read and scan
-        {"- Present a noticeably different angle than previous drafts" if is_variation else ""}
-        
-        Return only the description text.{variation_suffix if is_variation else ""}
-        """
-        
-        description = self._call_ollama(description_prompt) or f"Discover {request.product_name}: {', '.join(request.key_features[:3])}. {request.call_to_action}"
-        
-        # Generate call-to-action
-        cta_prompt = f"""
-        Create a compelling call-to-action for a pamphlet about: {request.product_name}
-        
-        Original CTA: {request.call_to_action}
-        Tone: {request.tone}
-        Target audience: {request.target_audience}
-        {"Variation directive: " + profile.get("cta_hint", "") if is_variation else ""}
-        
-        The CTA should be:
-        - 1 short sentence (max 8-10 words)
-        - Action-oriented and urgent
-        - {request.tone} in tone
-        - Perfect for pamphlet button or banner
-        - Clear and specific
-        {"- Provide an alternate framing versus previous CTAs" if is_variation else ""}
-        
-        Return only the call-to-action text.{variation_suffix if is_variation else ""}
+        return self.generate_pamphlet_text_checked(request)[0]
+    
+    def generate_pamphlet_text_checked(self, request: PamphletRequest) -> Tuple[Dict[str, str], bool]:
         """
-        
-        cta = self._call_ollama(cta_prompt) or (request.call_to_action or "Learn more today")
-        
-        # Generate tagline
-        tagline_prompt = f"""
-        Create a memorable tagline for: {request.product_name}
-        
-        Description: {request.description}
-        Tone: {request.tone}
-        Target audience: {request.target_audience}
-        {"Variation directive: " + profile.get("tagline_hint", "") if is_variation else ""}
-        
-        The tagline should be:
-        - 2-4 words maximum
-        - Memorable and catchy
-        - {request.tone} in tone
-        - Perfect for pamphlet subheading
-        - Capture the essence of the product
-        {"- Offer a distinctly new phrasing" if is_variation else ""}
-        
-        Return only the tagline.{variation_suffix if is_variation else ""}
+        `generate_pamphlet_text` plus whether every field came from the model.
+
+        A field whose Ollama call failed or timed out is filled with
+        placeholder copy built from the request; callers must not cache
+        such results, or the placeholder outlives the outage.
         """
-        
-        tagline = self._call_ollama(tagline_prompt) or request.product_name
+        features_csv = ", ".join(request.key_features)
+        ctx = {
+            "product_name": request.product_name,
+            "description": request.description,
+            "tone": request.tone,
+            "target_audience": request.target_audience,
+            "style": request.style,
+            "call_to_action": request.call_to_action,
+            "features_csv": features_csv,
+        }
+        if request.regeneration_index > 0:
+            profile = VARIATION_PROFILES[request.regeneration_index & _VP_MASK]
+            ctx.update(_VARIATION_SLOTS)
+            ctx.update(
+                headline_directive="Additional directive: " + profile.get("headline_hint", ""),
+                description_directive="Variation directive: " + profile.get("description_hint", ""),
+                cta_directive="Variation directive: " + profile.get("cta_hint", ""),
+                tagline_directive="Variation directive: " + profile.get("tagline_hint", ""),
+            )
+        else:
+            ctx.update(_NO_VARIATION_SLOTS)
+        
+        # The four prompts are independent, so they are sent concurrently and
+        # overlap on the Ollama server (see OLLAMA_NUM_PARALLEL).
+        fields = [
+            ("headline", HEADLINE_TMPL.format_map(ctx)),
+            ("description", DESCRIPTION_TMPL.format_map(ctx)),
+            ("call_to_action", CTA_TMPL.format_map(ctx)),
+            ("tagline", TAGLINE_TMPL.format_map(ctx)),
+        ]
+        if request.regeneration_index > 0:
+            # Variation profiles cycle, so regenerations k and k+4 build the
+            # same prompts; "Regenerate" must always sample new copy
+            headline, description, cta, tagline = self._generate_all(
+                [prompt for _, prompt in fields], [field for field, _ in fields]
+            )
+        else:
+            headline, description, cta, tagline = self._cached_generate_all(fields)
+        from_model = all((headline, description, cta, tagline))
+        headline = headline or request.product_name
+        description = description or f"Discover {request.product_name}: {', '.join(request.key_features[:3])}. {request.call_to_action}"
+        cta = cta or (request.call_to_action or "Learn more today")
+        tagline = tagline or request.product_name
         
         return {
             "headline": headline.strip().replace('"', '').replace("'", ""),
             "description": description.strip(),
             "call_to_action": cta.strip(),
             "tagline": tagline.strip().replace('"', '').replace("'", "")
-        }
+        }, from_model
     
-    def _call_ollama(self, prompt: str) -> str:
-        """Make API call to Ollama"""
+    def _cached_generate_all(self, fields: List[Tuple[str, str]]) -> List[str]:
+        """
+        `_generate_all` over `(field, prompt)` pairs with a per-field cache.
+
+        Entries are keyed by `(field, model, sha1(prompt))`; only the misses
+        are sent to Ollama, and empty (failed) responses are not cached.
+        Only first drafts use it (regenerations are never memoized).
+        """
+        keys = [(field, self.model, hashlib.sha1(prompt.encode("utf-8")).hexdigest()) for field, prompt in fields]
+        results = [self._prompt_cache.get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            responses = self._generate_all([fields[i][1] for i in misses], [fields[i][0] for i in misses])
+            for i, response in zip(misses, responses):
+                results[i] = response
+                if response:
+                    self._prompt_cache.put(keys[i], response)
+        return results
+
+    def _call_ollama(self, prompt: str, temperature: Optional[float] = None) -> str:
+        """
+        Make API call to Ollama.
+
+        Greedy (`temperature=0`) completions are deterministic, so they are
+        memoized on disk across runs unless `OLLAMA_NO_CACHE=1` is set;
+        sampled ones always go to the model.
+        """
+        disk_cache = None
+        key = None
+        if temperature == 0 and os.environ.get("OLLAMA_NO_CACHE") != "1":
+            disk_cache = _ollama_disk_cache()
+            key = hashlib.blake2b(f"{self.model}\0{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+            cached = disk_cache.get(key)
+            if cached is not None:
+                return cached
+        extra = {} if temperature is None else {"options": {"temperature": temperature}}
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
+                json=self._payload(prompt, **extra),
+                timeout=30
+            )
+            response.raise_for_status()
+            text = response.json()["response"]
+        except Exception as e:
+            print(f"Error calling Ollama: {e}")
+            return ""
+        if disk_cache is not None and text:
+            disk_cache.set(key, text, expire=OLLAMA_DISK_CACHE_TTL)
+        return text
+
+    async def _acall_ollama(self, client: httpx.AsyncClient, prompt: str, field: Optional[str] = None) -> str:
+        """Async counterpart of `_call_ollama`; fields in STREAM_LIMITS are streamed."""
+        if field in STREAM_LIMITS:
+            return await self._astream_ollama(client, prompt, *STREAM_LIMITS[field])
+        try:
+            response = await client.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt),
                 timeout=30
             )
             response.raise_for_status()
@@ -203,6 +589,147 @@ class OllamaTextGenerator:
             print(f"Error calling Ollama: {e}")
             return ""
 
+    async def _astream_ollama(self, client: httpx.AsyncClient, prompt: str, max_words: int, num_predict: int) -> str:
+        """
+        Stream a short completion and hang up once it is long enough.
+
+        Stops at the first blank line after some text or as soon as a word
+        beyond `max_words` starts; leaving the `stream` block closes the
+        connection, which makes Ollama abort the rest of the decode.
+        """
+        text = ""
+        try:
+            payload = self._payload(prompt, stream=True, options={"num_predict": num_predict})
+            async with client.stream("POST", f"{self.base_url}/api/generate", json=payload, timeout=30) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    text += chunk.get("response", "")
+                    stripped = text.strip()
+                    if chunk.get("done") or "\n\n" in stripped:
+                        break
+                    words = stripped.split()
+                    if len(words) > max_words:
+                        # The last word is the start of one we don't want
+                        text = " ".join(words[:max_words])
+                        break
+        except Exception as e:
+            print(f"Error calling Ollama: {e}")
+            return ""
+        return text.strip().split("\n\n", 1)[0]
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # Created on the loop thread; a client inherited from a forked parent
+        # belongs to a dead loop and is dropped rather than reused
+        if self._aclient is None or self._aclient_thread is not threading.current_thread():
+            self._aclient = httpx.AsyncClient(
+                timeout=30,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+            )
+            self._aclient_thread = threading.current_thread()
+        return self._aclient
+
+    async def _agenerate_all(self, prompts: List[str], fields: List[Optional[str]]) -> List[str]:
+        client = self._async_client()
+        return await asyncio.gather(
+            *(self._acall_ollama(client, prompt, field) for prompt, field in zip(prompts, fields))
+        )
+
+    def _generate_all(self, prompts: List[str], fields: Optional[List[Optional[str]]] = None) -> List[str]:
+        """
+        Run several prompts concurrently and return the responses in order.
+
+        `fields` names the pamphlet field each prompt is for, which selects
+        its streaming limits (see STREAM_LIMITS).
+        """
+        return self._loop.run(self._agenerate_all(prompts, fields or [None] * len(prompts)))
+
+    async def aclose(self) -> None:
+        """Close the async client; must run on the loop that created it."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    def close(self) -> None:
+        """Release pooled connections and the background loop thread."""
+        if self._aclient is not None and self._aclient_thread is not None and self._aclient_thread.is_alive():
+            self._loop.run(self.aclose())
+        self._aclient = None
+        self._loop.stop()
+        self.session.close()
+
+
+class BatchedTextGenerator(OllamaTextGenerator):
+    """
+    OllamaTextGenerator that coalesces prompts from concurrent requests.
+
+    While more than one pamphlet is being generated, requests that arrive
+    together are dispatched as one batch: the first to queue leads and waits
+    (at most `window` seconds, or until `max_batch` requests are queued) only
+    while another request has entered but not yet queued, so nobody waits on
+    arrivals that may never come. Ollama's /api/generate has no array form, so
+    a batch is a single asyncio.gather over the distinct prompts: identical
+    prompts from simultaneous users are sent once and fanned back out.
+    A lone request skips batching entirely.
+    """
+
+    def __init__(self, *args: Any, window: float = 0.1, max_batch: int = 8, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[List[Tuple[Optional[str], str]], Future]] = []
+        self._active = 0
+        # Requests past the `alone` check that have not reached `_pending` yet
+        self._joining = 0
+        self._cond = threading.Condition()
+
+    def _generate_all(self, prompts: List[str], fields: Optional[List[Optional[str]]] = None) -> List[str]:
+        with self._cond:
+            self._active += 1
+            alone = self._active == 1 and not self._pending
+            if not alone:
+                self._joining += 1
+        try:
+            if alone:
+                return super()._generate_all(prompts, fields)
+            return self._submit(list(zip(fields or [None] * len(prompts), prompts)))
+        finally:
+            with self._cond:
+                self._active -= 1
+
+    def _submit(self, items: List[Tuple[Optional[str], str]]) -> List[str]:
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((items, future))
+            self._joining -= 1
+            is_leader = len(self._pending) == 1
+            # Wakes a leader waiting on this request (or on a full batch)
+            self._cond.notify_all()
+        if is_leader:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._joining == 0 or len(self._pending) >= self.max_batch,
+                    timeout=self.window,
+                )
+                batch, self._pending = self._pending, []
+            self._flush(batch)
+        return future.result()
+
+    def _flush(self, batch: List[Tuple[List[Tuple[Optional[str], str]], Future]]) -> None:
+        # (field, prompt) pairs, since the field decides how a prompt is streamed
+        unique = list(dict.fromkeys(item for items, _ in batch for item in items))
+        try:
+            generated = super()._generate_all([prompt for _, prompt in unique], [field for field, _ in unique])
+            responses = dict(zip(unique, generated))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for items, future in batch:
+            future.set_result([responses[item] for item in items])
+
 
 class TextGenerationAgent:
     """
@@ -213,8 +740,40 @@ class TextGenerationAgent:
     a narrow, easy-to-toggle interface for the pamphlet system.
     """
 
-    def __init__(self, text_backend: Optional[OllamaTextGenerator] = None) -> None:
+    def __init__(
+        self,
+        text_backend: Optional[OllamaTextGenerator] = None,
+        cache_size: int = 512,
+        semantic_cache: Optional[SemanticTextCache] = None,
+    ) -> None:
         self.text_backend = text_backend or OllamaTextGenerator()
+        # Identical product inputs produce identical prompts, so the Ollama
+        # round-trips can be skipped entirely for repeat submissions.
+        self._text_cache = _LRUCache(cache_size)
+        self.semantic_cache = semantic_cache if semantic_cache is not None else SHARED_SEMANTIC_CACHE
+
+    @staticmethod
+    def cache_key(request: PamphletRequest) -> Tuple[Any, ...]:
+        """Everything the text prompts depend on (image fields are excluded)."""
+        return (
+            request.product_name,
+            request.description,
+            request.tone,
+            request.target_audience,
+            tuple(request.key_features),
+            request.call_to_action,
+            request.style,
+            request.regeneration_index,
+        )
+
+    def warmup(self) -> bool:
+        """Preload the Ollama model so the first pamphlet doesn't pay the load time."""
+        return self.text_backend.warmup()
+
+    def cached(self, request: PamphletRequest) -> Optional[Dict[str, str]]:
+        """Return previously generated text for this request, if any."""
+        text_content = self._text_cache.get(self.cache_key(request))
+        return dict(text_content) if text_content is not None else None
 
     def generate(self, request: PamphletRequest) -> Dict[str, str]:
         """
@@ -226,7 +785,36 @@ class TextGenerationAgent:
         - call_to_action
         - tagline
         """
-        return self.text_backend.generate_pamphlet_text(request)
+        return self.generate_checked(request)[0]
+
+    def generate_checked(self, request: PamphletRequest) -> Tuple[Dict[str, str], bool]:
+        """`generate` plus whether the copy came from the model (cached copy always did)."""
+        text_content = self.cached(request)
+        if text_content is not None:
+            return text_content, True
+
+        # Regenerations explicitly ask for fresh copy, so only first drafts
+        # are matched against semantically similar earlier requests.
+        vector = None
+        if request.regeneration_index == 0:
+            vector = self.semantic_cache.embed(request)
+            text_content = self.semantic_cache.lookup(vector) if vector is not None else None
+            if text_content is not None:
+                self._text_cache.put(self.cache_key(request), dict(text_content))
+                return text_content, True
+
+        text_content, from_model = self.text_backend.generate_pamphlet_text_checked(request)
+        # Placeholder copy from a failed Ollama call would otherwise be served
+        # for this request (and, through the persisted semantic index, for
+        # similar products) long after Ollama is back
+        if from_model:
+            self._text_cache.put(self.cache_key(request), dict(text_content))
+            if vector is not None:
+                self.semantic_cache.add(vector, text_content)
+        return text_content, from_model
+
+
+_WS_RE = re.compile(r"\s+")
 
 
 class ContentEditingAgent:
@@ -253,10 +841,11 @@ class ContentEditingAgent:
         # Normalize whitespace
         for key in ["headline", "description", "call_to_action", "tagline"]:
             value = refined.get(key, "") or ""
-            refined[key] = " ".join(value.split())
+            refined[key] = _WS_RE.sub(" ", value).strip()
 
-        # Shorten headline slightly to keep it layout-friendly
-        headline_words = refined.get("headline", "").split()
+        # Shorten headline slightly to keep it layout-friendly; words are now
+        # single-space separated, so a bounded split finds the cut point
+        headline_words = refined["headline"].split(" ", self.max_headline_words)
         if len(headline_words) > self.max_headline_words:
             refined["headline"] = " ".join(headline_words[: self.max_headline_words])
 
@@ -268,30 +857,60 @@ class ContentEditingAgent:
 
         return refined
 
+# Product categories for the background prompt. Matching is by substring (so
+# "app" also matches "apparel"), exactly as the original any(...) scans did;
+# each group is one precompiled alternation searched once per request.
+FOOD_KEYWORDS = ('food', 'cookies', 'biscuits', 'sweets', 'chocolate', 'bakery', 'restaurant', 'cafe')
+TECH_KEYWORDS = ('tech', 'software', 'app', 'digital', 'computer', 'phone', 'gadget')
+BEAUTY_KEYWORDS = ('beauty', 'cosmetics', 'skincare', 'makeup', 'fashion', 'clothing')
+FOOD_KEYWORDS_RE = re.compile("|".join(map(re.escape, FOOD_KEYWORDS)))
+TECH_KEYWORDS_RE = re.compile("|".join(map(re.escape, TECH_KEYWORDS)))
+BEAUTY_KEYWORDS_RE = re.compile("|".join(map(re.escape, BEAUTY_KEYWORDS)))
+
+
 class StableDiffusionGenerator:
     """Handles image generation using Stability AI API"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[requests.Session] = None):
         self.api_key = api_key
         self.base_url = "https://api.stability.ai/v2beta/stable-image/generate/core"
+        # Reuse TLS connections across pamphlets instead of a handshake per image;
+        # callers may share their own pooled session instead
+        self.session = session or _pooled_session("https://", pool_size=4)
+        self._background_cache = _LRUCache(maxsize=64)
     
-    def generate_pamphlet_image(self, request: PamphletRequest, text_content: Dict[str, str]) -> Optional[bytes]:
-        """Generate background image for pamphlet"""
-        
-        variation_hint = ""
-        if request.regeneration_index and IMAGE_VARIATION_HINTS:
-            variation_hint = IMAGE_VARIATION_HINTS[request.regeneration_index % len(IMAGE_VARIATION_HINTS)]
+    def generate_pamphlet_image(
+        self,
+        request: PamphletRequest,
+        text_content: Optional[Dict[str, str]] = None,
+    ) -> Optional[bytes]:
+        """
+        Generate background image for pamphlet.
+
+        Only `request` is used (the prompt never reads the copy), so this can
+        run before or alongside text generation; `text_content` is accepted
+        for backwards compatibility and ignored.
+        """
         
         # Use custom uploaded image if provided
         if request.image_source == 'custom_upload' and request.custom_image:
             try:
                 # Decode base64 image
-                image_data = base64.b64decode(request.custom_image)
+                image_data = b64decode(request.custom_image)
                 return image_data
             except Exception as e:
                 print(f"Error processing custom image: {e}")
                 # Fall back to AI generation
         
+        return self.generate_background(self.build_image_prompt(request), request.regeneration_index)
+    
+    def build_image_prompt(self, request: PamphletRequest) -> str:
+        """Build the Stability AI prompt; it depends only on `request` fields."""
+        
+        variation_hint = ""
+        if request.regeneration_index:
+            variation_hint = IMAGE_VARIATION_HINTS[request.regeneration_index & _IMG_HINT_MASK]
+        
         # Use custom image prompt if provided, otherwise generate based on product type
         if request.image_prompt and request.image_prompt.strip():
             image_prompt = f"""
@@ -308,7 +927,8 @@ class StableDiffusionGenerator:
             """
         else:
             # Create detailed prompt for image generation based on product type
-            if any(word in request.product_name.lower() for word in ['food', 'cookies', 'biscuits', 'sweets', 'chocolate', 'bakery', 'restaurant', 'cafe']):
+            product_name = request.product_name.lower()
+            if FOOD_KEYWORDS_RE.search(product_name):
                 image_prompt = f"""
                 Professional food product pamphlet background for {request.product_name}:
                 - Appetizing food photography style
@@ -322,7 +942,7 @@ class StableDiffusionGenerator:
                 - 4K quality, magazine-style photography
                 {"- " + variation_hint if variation_hint else ""}
                 """
-            elif any(word in request.product_name.lower() for word in ['tech', 'software', 'app', 'digital', 'computer', 'phone', 'gadget']):
+            elif TECH_KEYWORDS_RE.search(product_name):
                 image_prompt = f"""
                 Modern tech product pamphlet background for {request.product_name}:
                 - Clean, minimalist tech aesthetic
@@ -335,7 +955,7 @@ class StableDiffusionGenerator:
                 - 4K quality, modern design
                 {"- " + variation_hint if variation_hint else ""}
                 """
-            elif any(word in request.product_name.lower() for word in ['beauty', 'cosmetics', 'skincare', 'makeup', 'fashion', 'clothing']):
+            elif BEAUTY_KEYWORDS_RE.search(product_name):
                 image_prompt = f"""
                 Elegant beauty/fashion pamphlet background for {request.product_name}:
                 - Soft, elegant beauty photography
@@ -360,6 +980,23 @@ class StableDiffusionGenerator:
                 - 4K quality, commercial photography
                 {"- " + variation_hint if variation_hint else ""}
                 """
+        return image_prompt
+    
+    def generate_background(self, image_prompt: str, regeneration_index: int = 0) -> Optional[bytes]:
+        """
+        Generate (or reuse) the background for a prompt.
+
+        Backgrounds are cached by the full prompt and regeneration index, so
+        copy-only edits such as a new call-to-action re-render text over the
+        previous image instead of paying for another Stability AI call. The
+        index is part of the key because the variation hints cycle: without
+        it regeneration N+4 would get regeneration N's pixels back.
+        """
+        cache_key = (image_prompt, regeneration_index)
+        cached = self._background_cache.get(cache_key)
+        if cached is not None:
+            print("♻️ Reusing cached background image...")
+            return cached
         
         try:
             headers = {
@@ -374,118 +1011,351 @@ class StableDiffusionGenerator:
                 "mode": (None, "text-to-image")
             }
             
-            response = requests.post(self.base_url, headers=headers, files=files, timeout=60)
+            response = self.session.post(self.base_url, headers=headers, files=files, timeout=60)
             response.raise_for_status()
             
+            self._background_cache.put(cache_key, response.content)
             return response.content
             
         except Exception as e:
             print(f"Error generating image: {e}")
             return None
 
+    def close(self) -> None:
+        """Release pooled HTTPS connections."""
+        self.session.close()
+
+FONT_CANDIDATES: Dict[str, List[str]] = {
+    "Arial": [
+        "arial.ttf",
+        "Arial.ttf",
+        "/System/Library/Fonts/Supplemental/Arial.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ],
+    "Arial-Bold": [
+        "arialbd.ttf",
+        "Arial Bold.ttf",
+        "Arial-Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    ],
+    "Helvetica": [
+        "Helvetica.ttf",
+        "/System/Library/Fonts/Supplemental/Helvetica.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ],
+    "Helvetica-Bold": [
+        "Helvetica Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Helvetica Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    ],
+    "Times": [
+        "Times New Roman.ttf",
+        "times.ttf",
+        "/System/Library/Fonts/Supplemental/Times New Roman.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf",
+    ],
+    "Times-Bold": [
+        "Times New Roman Bold.ttf",
+        "timesbd.ttf",
+        "/System/Library/Fonts/Supplemental/Times New Roman Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSerif-Bold.ttf",
+    ],
+    "Georgia": [
+        "Georgia.ttf",
+        "/System/Library/Fonts/Supplemental/Georgia.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf",
+    ],
+    "Georgia-Bold": [
+        "Georgia Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Georgia Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSerif-Bold.ttf",
+    ],
+    "Verdana": [
+        "Verdana.ttf",
+        "/System/Library/Fonts/Supplemental/Verdana.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    ],
+    "Verdana-Bold": [
+        "Verdana Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Verdana Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+    ],
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_font_path(font_key: str) -> Optional[str]:
+    """First candidate for `font_key` that FreeType can open (bare names use its search path)."""
+    for candidate in FONT_CANDIDATES.get(font_key, []):
+        try:
+            ImageFont.truetype(candidate, 12)
+            return candidate
+        except (OSError, IOError):
+            continue
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _default_font() -> ImageFont.ImageFont:
+    # One shared fallback, so every (family, size) without a TTF reuses the
+    # same object (and the same text-measurement cache entries)
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_font(font_key: str, size: int) -> ImageFont.FreeTypeFont:
+    path = _resolve_font_path(font_key)
+    if path is None:
+        return _default_font()
+    return ImageFont.truetype(path, size)
+
+
+@functools.lru_cache(maxsize=1)
+def _sepia_kernel():
+    """Build the Numba sepia kernel on first use; None when numba is unavailable."""
+    if not HAS_NUMBA:
+        return None
+    import numba
+
+    # cache=True persists the compiled kernel next to this module (or in
+    # NUMBA_CACHE_DIR), so only the first process ever pays the JIT cost.
+    # fastmath stays off: it lets LLVM reorder the sums and the truncated
+    # result would drift from _sepia_numpy.
+    @numba.njit(parallel=True, cache=True)
+    def kernel(src: np.ndarray, out: np.ndarray) -> None:
+        """Sepia over an HxWx3 uint8 array, rows split across cores (same math as the Python loop)."""
+        height, width = src.shape[0], src.shape[1]
+        for py in numba.prange(height):
+            for px in range(width):
+                r = src[py, px, 0]
+                g = src[py, px, 1]
+                b = src[py, px, 2]
+                out[py, px, 0] = min(255, int(0.393 * r + 0.769 * g + 0.189 * b))
+                out[py, px, 1] = min(255, int(0.349 * r + 0.686 * g + 0.168 * b))
+                out[py, px, 2] = min(255, int(0.272 * r + 0.534 * g + 0.131 * b))
+
+    return kernel
+
+
+# Rows are the output R, G, B weights of the classic sepia tone
+SEPIA_WEIGHTS = ((0.393, 0.769, 0.189), (0.349, 0.686, 0.168), (0.272, 0.534, 0.131))
+
+
+def _sepia_numpy(src: np.ndarray) -> np.ndarray:
+    """
+    Vectorised sepia without Numba. The weighted sums are evaluated in float64
+    in the same order as the scalar formula (rather than through a BLAS
+    matmul, which may fuse or reorder them), so the truncated result matches
+    the scalar version bit for bit. Two scratch planes are reused across the
+    channels so the arithmetic allocates nothing per channel, and the 255
+    clamp is a branchless np.minimum.
+    """
+    r, g, b = (src[..., i].astype(np.float64) for i in range(3))
+    out = np.empty_like(src)
+    acc = np.empty(r.shape)
+    tmp = np.empty(r.shape)
+    for channel, (wr, wg, wb) in enumerate(SEPIA_WEIGHTS):
+        np.multiply(r, wr, out=acc)
+        np.multiply(g, wg, out=tmp)
+        acc += tmp
+        np.multiply(b, wb, out=tmp)
+        acc += tmp
+        np.minimum(acc, 255, out=acc)
+        out[..., channel] = acc
+    return out
+
+
+# Palettes for PamphletRequest.color_scheme; shared, so treat as read-only
+COLOR_SCHEMES: Dict[str, Dict[str, Tuple[int, int, int]]] = {
+    "modern": {
+        "text": (240, 247, 255),
+        "accent": (111, 203, 255),
+        "cta": (255, 102, 102),
+        "overlay": (12, 24, 42),
+    },
+    "elegant": {
+        "text": (255, 255, 255),
+        "accent": (255, 215, 0),
+        "cta": (194, 24, 91),
+        "overlay": (35, 22, 58),
+    },
+    "minimal": {
+        "text": (38, 38, 38),
+        "accent": (18, 132, 108),
+        "cta": (0, 112, 201),
+        "overlay": (245, 245, 245),
+    },
+}
+
+
+# Text measurements repeat heavily: the description is wrapped once to
+# estimate the block height and again to draw it. Fonts come from the
+# process-wide _cached_font cache, so keying on the font object is stable.
+@functools.lru_cache(maxsize=4096)
+def _text_bbox(font: ImageFont.FreeTypeFont, text: str) -> Tuple[int, int, int, int]:
+    return font.getbbox(text)
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_length(font: ImageFont.FreeTypeFont, text: str) -> float:
+    try:
+        return font.getlength(text)
+    except AttributeError:
+        bbox = font.getbbox(text)
+        return bbox[2] - bbox[0]
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_hex_color(color_value: str, default: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    """Parse "#rrggbb" (the edit UI sends the same few values over and over)."""
+    value = color_value.strip().lstrip("#")
+    if len(value) == 6:
+        try:
+            r = int(value[0:2], 16)
+            g = int(value[2:4], 16)
+            b = int(value[4:6], 16)
+            return (r, g, b)
+        except ValueError:
+            pass
+    return default
+
+
+def _encode_image(image: Image.Image, output_format: str = "PNG", png_compress_level: int = 1) -> bytes:
+    """
+    Encode a rendered canvas for transport.
+
+    PNG ignores `quality`; zlib level 1 is several times faster than the
+    default level 6 for a ~30% bigger file. JPEG is smaller and faster still
+    but lossy and without alpha, so it is only used where asked for.
+    Callers that store PNGs long-term can pass a higher `png_compress_level`.
+    """
+    output = io.BytesIO()
+    if output_format.upper() in ("JPEG", "JPG"):
+        image.convert("RGB").save(output, format="JPEG", quality=88, optimize=False, progressive=False)
+    else:
+        image.save(output, format="PNG", compress_level=png_compress_level, optimize=False)
+    return output.getvalue()
+
+
+# Pillow's encoders release the GIL around zlib/libjpeg, so independent
+# encodes can overlap on spare cores; on a single core it only adds overhead
+_ENCODE_POOL = (
+    ThreadPoolExecutor(max_workers=2, thread_name_prefix="pamphlet-encode")
+    if (os.cpu_count() or 1) > 1
+    else None
+)
+
+
+def _encode_images(*jobs: Tuple[Image.Image, str], png_compress_level: int = 1) -> List[bytes]:
+    """Encode `(image, output_format)` jobs, the first in the caller and the rest on the encode pool."""
+    if _ENCODE_POOL is None or len(jobs) < 2:
+        return [_encode_image(image, output_format, png_compress_level) for image, output_format in jobs]
+    futures = [
+        _ENCODE_POOL.submit(_encode_image, image, output_format, png_compress_level)
+        for image, output_format in jobs[1:]
+    ]
+    return [_encode_image(*jobs[0], png_compress_level)] + [future.result() for future in futures]
+
+
 class PamphletDesigner:
     """Handles the visual design and layout of the pamphlet"""
     
-    def __init__(self):
-        self.font_candidates: Dict[str, List[str]] = {
-            "Arial": [
-                "arial.ttf",
-                "Arial.ttf",
-                "/System/Library/Fonts/Supplemental/Arial.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            ],
-            "Arial-Bold": [
-                "arialbd.ttf",
-                "Arial Bold.ttf",
-                "Arial-Bold.ttf",
-                "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-            ],
-            "Helvetica": [
-                "Helvetica.ttf",
-                "/System/Library/Fonts/Supplemental/Helvetica.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            ],
-            "Helvetica-Bold": [
-                "Helvetica Bold.ttf",
-                "/System/Library/Fonts/Supplemental/Helvetica Bold.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-            ],
-            "Times": [
-                "Times New Roman.ttf",
-                "times.ttf",
-                "/System/Library/Fonts/Supplemental/Times New Roman.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf",
-            ],
-            "Times-Bold": [
-                "Times New Roman Bold.ttf",
-                "timesbd.ttf",
-                "/System/Library/Fonts/Supplemental/Times New Roman Bold.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSerif-Bold.ttf",
-            ],
-            "Georgia": [
-                "Georgia.ttf",
-                "/System/Library/Fonts/Supplemental/Georgia.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf",
-            ],
-            "Georgia-Bold": [
-                "Georgia Bold.ttf",
-                "/System/Library/Fonts/Supplemental/Georgia Bold.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSerif-Bold.ttf",
-            ],
-            "Verdana": [
-                "Verdana.ttf",
-                "/System/Library/Fonts/Supplemental/Verdana.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            ],
-            "Verdana-Bold": [
-                "Verdana Bold.ttf",
-                "/System/Library/Fonts/Supplemental/Verdana Bold.ttf",
-                "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-            ],
-        }
+    def __init__(self, output_format: str = "PNG", use_opencv: bool = False):
+        # Format of the finished (text) pamphlet; the textless base is always
+        # PNG since it is decoded again for every edit
+        self.output_format = output_format
+        # Opt-in: OpenCV's SIMD kernels run the sepia and brightness edits
+        # several times faster, but round where the default path truncates
+        # (up to 1 LSB per channel), so output is not bit-identical
+        if use_opencv and not HAS_OPENCV:
+            print("⚠️ OpenCV not installed; using the Pillow/NumPy edit filters")
+        self.use_opencv = use_opencv and HAS_OPENCV
+        self.font_candidates = FONT_CANDIDATES
+        # Panel-only overlays, keyed by geometry and panel style
+        self._overlay_cache = _LRUCache(maxsize=8)
+        self._mask_cache = _LRUCache(maxsize=32)
+        # Blurred CTA drop shadows, keyed by box size and shadow alpha
+        self._shadow_cache = _LRUCache(maxsize=32)
         self.default_layout_cycle = ["centered", "split", "left-aligned", "right-aligned"]
+        # Parse the fonts every generated pamphlet uses up front
+        for font_key, size in (("Arial-Bold", 70), ("Arial-Bold", 34), ("Arial", 34), ("Arial", 28), ("Arial", 26)):
+            _cached_font(font_key, size)
     
     def create_pamphlet(
         self,
-        image_data: bytes,
+        image_data: Union[bytes, Image.Image],
         text_content: Dict[str, str],
         request: PamphletRequest,
     ) -> bytes:
-        """Create the final pamphlet design"""
+        """Create the final pamphlet design (from encoded bytes or an already decoded image)"""
         
-        base_image = Image.open(io.BytesIO(image_data)).convert("RGBA")
+        base_image = self._prepare_base(image_data)
+        return self._render_variation(base_image, text_content, request)
+    
+    def batch(
+        self,
+        image_data: Union[bytes, Image.Image],
+        text_contents: List[Dict[str, str]],
+        request: PamphletRequest,
+        k: int,
+    ) -> List[Tuple[bytes, bytes]]:
+        """
+        Render `k` layout variations of one background in a single call.
+
+        Variation `i` is what `create_pamphlet` would produce for
+        `regeneration_index + i` with `text_contents[i]` (the last entry is
+        reused if fewer are given). The decode and LANCZOS fit happen once.
+        """
+        base_image = self._prepare_base(image_data)
+        return [
+            self._render_variation(
+                base_image,
+                text_contents[min(i, len(text_contents) - 1)],
+                replace(request, regeneration_index=request.regeneration_index + i),
+            )
+            for i in range(k)
+        ]
+    
+    def _prepare_base(self, image_data: Union[bytes, Image.Image]) -> Image.Image:
+        # In-memory images skip the PNG decode; they are never drawn on
+        if isinstance(image_data, Image.Image):
+            base_image = image_data
+        else:
+            base_image = Image.open(io.BytesIO(image_data))
+        # Both steps would be full-canvas copies when there is nothing to do
+        if base_image.mode != "RGBA":
+            base_image = base_image.convert("RGBA")
         canvas_size = (1200, 1600)
-        base_image = ImageOps.fit(base_image, canvas_size, Image.Resampling.LANCZOS)
-        
+        if base_image.size != canvas_size:
+            base_image = ImageOps.fit(base_image, canvas_size, Image.Resampling.LANCZOS)
+        return base_image
+    
+    def _render_variation(
+        self,
+        base_image: Image.Image,
+        text_content: Dict[str, str],
+        request: PamphletRequest,
+    ) -> Tuple[bytes, bytes]:
         layout_choice = self.default_layout_cycle[
             request.regeneration_index % len(self.default_layout_cycle)
         ]
         
         config = self._build_design_config(request, layout_choice)
-        textless_canvas = self._compose_layout(
+        textless_canvas, composed = self._compose_layout(
             base_image,
             text_content,
             config,
             features=request.key_features,
-            render_text=False,
         )
-        composed = self._compose_layout(
-            base_image,
-            text_content,
-            config,
-            features=request.key_features,
-            render_text=True,
-        )
-        
-        final_output = io.BytesIO()
-        composed.convert("RGB").save(final_output, format="PNG", quality=95)
         
-        base_output = io.BytesIO()
-        textless_canvas.convert("RGB").save(base_output, format="PNG", quality=95)
-        return final_output.getvalue(), base_output.getvalue()
+        pamphlet_bytes, layout_base_bytes = _encode_images(
+            (composed.convert("RGB"), self.output_format),
+            (textless_canvas.convert("RGB"), "PNG"),
+        )
+        return pamphlet_bytes, layout_base_bytes
     
     def apply_edits(
         self,
@@ -497,47 +1367,98 @@ class PamphletDesigner:
         """
         Apply editing controls to an existing pamphlet image and re-render text to match the preview.
         """
-        image = base_image.convert("RGBA")
+        image = self._edit_source(base_image)
+        background = self._prepare_edit_background(image, self._edit_background_params(image, edits))
+        return self._render_edit(background, edits, text_content, features)
+    
+    def apply_edits_batch(
+        self,
+        base_image: Image.Image,
+        edits_list: List[Dict[str, Any]],
+        text_content: Optional[Dict[str, str]] = None,
+        features: Optional[List[str]] = None,
+    ) -> List[Tuple[Image.Image, Image.Image]]:
+        """
+        `apply_edits` for several edit sets on one image.
+
+        Identical edit sets are rendered once (their entries share the result
+        objects), and sets that only differ in layout/text settings share the
+        crop, fit, filter and brightness work on the background.
+        """
+        image = self._edit_source(base_image)
+        backgrounds: Dict[Tuple[Any, ...], Image.Image] = {}
+        rendered: Dict[str, Tuple[Image.Image, Image.Image]] = {}
+        results = []
+        for edits in edits_list:
+            edit_key = json.dumps(edits, sort_keys=True, default=str)
+            if edit_key not in rendered:
+                params = self._edit_background_params(image, edits)
+                if params not in backgrounds:
+                    backgrounds[params] = self._prepare_edit_background(image, params)
+                rendered[edit_key] = self._render_edit(backgrounds[params], edits, text_content, features)
+            results.append(rendered[edit_key])
+        return results
+    
+    @staticmethod
+    def _edit_source(base_image: Image.Image) -> Image.Image:
+        """
+        The image the edit background is prepared from. Opaque RGB input
+        stays RGB, so crop/fit/filter/brightness move 3 bytes per pixel
+        instead of 4; `_compose_layout` adds the alpha band at the end, which
+        gives the same pixels as promoting up front. Not copied either way:
+        the crop/fit always returns a new image, so `base_image` itself is
+        never written to.
+        """
+        if base_image.mode in ("RGB", "RGBA"):
+            return base_image
+        return base_image.convert("RGBA")
+    
+    def _edit_background_params(self, image: Image.Image, edits: Dict[str, Any]) -> Tuple[Any, ...]:
+        """The edit settings that affect the background image (before any text)."""
         target_size = (
             int(edits.get("size", {}).get("width", image.width)),
             int(edits.get("size", {}).get("height", image.height)),
         )
+        return (
+            target_size,
+            edits.get("imageCrop", "none"),
+            edits.get("imagePosition", "center"),
+            edits.get("imageFilter", "none"),
+            int(edits.get("filterIntensity", 50)),
+            int(edits.get("overallBrightness", 100)),
+        )
+    
+    def _prepare_edit_background(self, image: Image.Image, params: Tuple[Any, ...]) -> Image.Image:
+        target_size, crop_type, position, filter_type, intensity, overall_brightness = params
         
         # Apply cropping if requested before resizing
-        crop_type = edits.get("imageCrop", "none")
         if crop_type and crop_type != "none":
             image = self._apply_cropping(image, crop_type)
         
         # Fit image to requested size using positioning preference
-        position = edits.get("imagePosition", "center")
         image = self._fit_with_position(image, target_size, position)
         
         # Apply image level filters
-        filter_type = edits.get("imageFilter", "none")
-        intensity = int(edits.get("filterIntensity", 50))
         image = self._apply_image_filter(image, filter_type, intensity)
         
-        overall_brightness = int(edits.get("overallBrightness", 100))
         if overall_brightness != 100:
-            brightness_base = image.convert("RGB")
-            enhancer = ImageEnhance.Brightness(brightness_base)
-            image = enhancer.enhance(overall_brightness / 100).convert("RGBA")
-        
+            image = self._scale_brightness(image, overall_brightness / 100)
+        return image
+    
+    def _render_edit(
+        self,
+        background: Image.Image,
+        edits: Dict[str, Any],
+        text_content: Optional[Dict[str, str]],
+        features: Optional[List[str]],
+    ) -> Tuple[Image.Image, Image.Image]:
         # Build layout configuration from edits
         config = self._edits_to_config(edits)
-        textless_canvas = self._compose_layout(
-            image,
+        textless_canvas, composed = self._compose_layout(
+            background,
             text_content or {},
             config,
             features=features,
-            render_text=False,
-        )
-        composed = self._compose_layout(
-            image,
-            text_content or {},
-            config,
-            features=features,
-            render_text=True,
         )
         return composed.convert("RGB"), textless_canvas.convert("RGB")
     
@@ -619,9 +1540,11 @@ class PamphletDesigner:
         text_content: Dict[str, str],
         config: Dict[str, Any],
         features: Optional[List[str]] = None,
-        render_text: bool = True,
-    ) -> Image.Image:
-        image = base_image.copy().convert("RGBA")
+    ) -> Tuple[Image.Image, Image.Image]:
+        """Render the layout once and return `(textless, composed)` canvases."""
+        # Only the overlay is drawn on and alpha_composite returns a new image,
+        # so the base is read in place rather than cloned first
+        image = base_image if base_image.mode == "RGBA" else base_image.convert("RGBA")
         overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
         width, height = image.size
         margin_x = int(width * 0.08)
@@ -653,7 +1576,7 @@ class PamphletDesigner:
         # any "box" artifact behind the text. Text readability is handled via
         # shadows and color choices instead.
         if config.get("show_panel", False) and config.get("panel_opacity", 0) > 0:
-            self._draw_panel(overlay, panel_rect, config)
+            overlay = self._panel_overlay(image.size, panel_rect, config)
         
         fonts = {
             "headline": self._load_font(config["headline_font"], config["headline_size"]),
@@ -666,7 +1589,7 @@ class PamphletDesigner:
         draw = ImageDraw.Draw(overlay)
         removals = (text_content or {}).get("removeLines", {}) or {}
         custom_lines: List[str] = (text_content or {}).get("customText", []) or []
-        estimated_height = self._estimate_content_height(
+        estimated_height, description_lines = self._plan_text_layout(
             text_content or {},
             fonts,
             text_area_width,
@@ -684,113 +1607,124 @@ class PamphletDesigner:
             y_cursor = panel_rect[1]
         line_gap = int(config["body_size"] * config["line_spacing"])
         
-        if render_text:
-            # Headline
-            headline = (text_content or {}).get("headline", "").strip()
-            if headline and not removals.get("headline"):
+        # Snapshot the textless variant (background + optional panel) before
+        # any text is drawn, so one layout pass yields both images
+        textless = self._finish_canvas(image, overlay, config)
+        
+        # Headline
+        headline = (text_content or {}).get("headline", "").strip()
+        if headline and not removals.get("headline"):
+            y_cursor = self._draw_text_line(
+                overlay,
+                draw,
+                headline.upper(),
+                fonts["headline"],
+                config["colors"]["accent"],
+                (x_start, y_cursor, text_area_width),
+                align,
+                config["text_shadow"],
+            )
+            y_cursor += int(config["headline_size"] * 0.08)
+        
+        # Tagline
+        tagline = (text_content or {}).get("tagline", "").strip()
+        if tagline and not removals.get("tagline"):
+            y_cursor = self._draw_text_line(
+                overlay,
+                draw,
+                tagline.upper(),
+                fonts["tagline"],
+                config["colors"]["text"],
+                (x_start, y_cursor, text_area_width),
+                align,
+                config["text_shadow"],
+            )
+            y_cursor += int(config["tagline_size"] * 0.4)
+        
+        # Description
+        description = (text_content or {}).get("description", "").strip()
+        if description and not removals.get("description"):
+            for line in description_lines:
                 y_cursor = self._draw_text_line(
+                    overlay,
                     draw,
-                    headline.upper(),
-                    fonts["headline"],
-                    config["colors"]["accent"],
+                    line,
+                    fonts["body"],
+                    config["colors"]["text"],
                     (x_start, y_cursor, text_area_width),
                     align,
                     config["text_shadow"],
                 )
-                y_cursor += int(config["headline_size"] * 0.08)
+                y_cursor += int(config["body_size"] * 0.15)
+            y_cursor += line_gap
+        
+        # Feature list (for generated pamphlets)
+        if features:
+            y_cursor += int(config["body_size"] * 0.4)
+            feature_title = "Key Features"
+            y_cursor = self._draw_text_line(
+                overlay,
+                draw,
+                feature_title.upper(),
+                fonts["tagline"],
+                config["colors"]["accent"],
+                (x_start, y_cursor, text_area_width),
+                align if config["layout"] != "centered" else "left",
+                config["text_shadow"],
+            )
+            y_cursor += int(config["feature_size"] * 0.4)
             
-            # Tagline
-            tagline = (text_content or {}).get("tagline", "").strip()
-            if tagline and not removals.get("tagline"):
+            bullet_align = align if config["layout"] != "centered" else "left"
+            bullet_x_start = x_start if bullet_align != "right" else x_start + text_area_width
+            for feature in features[:4]:
+                bullet_text = f"• {feature}"
                 y_cursor = self._draw_text_line(
+                    overlay,
                     draw,
-                    tagline.upper(),
-                    fonts["tagline"],
+                    bullet_text,
+                    fonts["feature"],
                     config["colors"]["text"],
-                    (x_start, y_cursor, text_area_width),
-                    align,
+                    (bullet_x_start, y_cursor, text_area_width),
+                    bullet_align,
                     config["text_shadow"],
                 )
-                y_cursor += int(config["tagline_size"] * 0.4)
-            
-            # Description
-            description = (text_content or {}).get("description", "").strip()
-            if description and not removals.get("description"):
-                wrapped_lines = self._wrap_text(description, fonts["body"], text_area_width)
-                for line in wrapped_lines:
-                    y_cursor = self._draw_text_line(
-                        draw,
-                        line,
-                        fonts["body"],
-                        config["colors"]["text"],
-                        (x_start, y_cursor, text_area_width),
-                        align,
-                        config["text_shadow"],
-                    )
-                    y_cursor += int(config["body_size"] * 0.15)
-                y_cursor += line_gap
-            
-            # Feature list (for generated pamphlets)
-            if features:
-                y_cursor += int(config["body_size"] * 0.4)
-                feature_title = "Key Features"
+                y_cursor += int(config["feature_size"] * 0.3)
+            y_cursor += line_gap
+        
+        # CTA button
+        cta = (text_content or {}).get("call_to_action", "").strip()
+        if cta and not removals.get("call_to_action"):
+            y_cursor += int(config["cta_size"] * 0.4)
+            cta_text = cta.upper()
+            self._draw_cta(
+                overlay,
+                draw,
+                cta_text,
+                fonts["cta"],
+                config,
+                (x_start, y_cursor, text_area_width),
+                align,
+            )
+        
+        # Custom text block
+        if custom_lines and not removals.get("custom"):
+            y_cursor += int(config["body_size"] * 0.6)
+            for line in custom_lines:
                 y_cursor = self._draw_text_line(
-                    draw,
-                    feature_title.upper(),
-                    fonts["tagline"],
-                    config["colors"]["accent"],
-                    (x_start, y_cursor, text_area_width),
-                    align if config["layout"] != "centered" else "left",
-                    config["text_shadow"],
-                )
-                y_cursor += int(config["feature_size"] * 0.4)
-                
-                bullet_align = align if config["layout"] != "centered" else "left"
-                bullet_x_start = x_start if bullet_align != "right" else x_start + text_area_width
-                for feature in features[:4]:
-                    bullet_text = f"• {feature}"
-                    y_cursor = self._draw_text_line(
-                        draw,
-                        bullet_text,
-                        fonts["feature"],
-                        config["colors"]["text"],
-                        (bullet_x_start, y_cursor, text_area_width),
-                        bullet_align,
-                        config["text_shadow"],
-                    )
-                    y_cursor += int(config["feature_size"] * 0.3)
-                y_cursor += line_gap
-            
-            # CTA button
-            cta = (text_content or {}).get("call_to_action", "").strip()
-            if cta and not removals.get("call_to_action"):
-                y_cursor += int(config["cta_size"] * 0.4)
-                cta_text = cta.upper()
-                self._draw_cta(
                     overlay,
                     draw,
-                    cta_text,
-                    fonts["cta"],
-                    config,
+                    line,
+                    fonts["body"],
+                    config["colors"]["text"],
                     (x_start, y_cursor, text_area_width),
                     align,
+                    config["text_shadow"],
                 )
-            
-            # Custom text block
-            if custom_lines and not removals.get("custom"):
-                y_cursor += int(config["body_size"] * 0.6)
-                for line in custom_lines:
-                    y_cursor = self._draw_text_line(
-                        draw,
-                        line,
-                        fonts["body"],
-                        config["colors"]["text"],
-                        (x_start, y_cursor, text_area_width),
-                        align,
-                        config["text_shadow"],
-                    )
-                    y_cursor += int(config["body_size"] * 0.2)
-        
+                y_cursor += int(config["body_size"] * 0.2)
+
+        return textless, self._finish_canvas(image, overlay, config)
+    
+    def _finish_canvas(self, image: Image.Image, overlay: Image.Image, config: Dict[str, Any]) -> Image.Image:
         composed = Image.alpha_composite(image, overlay)
         border_radius = config.get("border_radius", 0)
         if border_radius > 0:
@@ -798,27 +1732,30 @@ class PamphletDesigner:
         return composed
     
     def _get_color_scheme(self, scheme: str) -> Dict[str, Tuple[int, int, int]]:
-        schemes = {
-            "modern": {
-                "text": (240, 247, 255),
-                "accent": (111, 203, 255),
-                "cta": (255, 102, 102),
-                "overlay": (12, 24, 42),
-            },
-            "elegant": {
-                "text": (255, 255, 255),
-                "accent": (255, 215, 0),
-                "cta": (194, 24, 91),
-                "overlay": (35, 22, 58),
-            },
-            "minimal": {
-                "text": (38, 38, 38),
-                "accent": (18, 132, 108),
-                "cta": (0, 112, 201),
-                "overlay": (245, 245, 245),
-            },
-        }
-        return schemes.get(scheme, schemes["modern"])
+        return COLOR_SCHEMES.get(scheme, COLOR_SCHEMES["modern"])
+    
+    def _panel_overlay(
+        self,
+        size: Tuple[int, int],
+        rect: Tuple[int, int, int, int],
+        config: Dict[str, Any],
+    ) -> Image.Image:
+        """Fresh overlay with the panel drawn, copied from a cached template."""
+        key = (
+            size,
+            rect,
+            tuple(config["colors"]["panel"]),
+            config.get("panel_opacity", 0.7),
+            config.get("panel_radius", 32),
+            config.get("panel_shadow", 0),
+        )
+        template = self._overlay_cache.get(key)
+        if template is None:
+            # The blurred shadow makes this the costly part of a panel layout
+            template = Image.new("RGBA", size, (0, 0, 0, 0))
+            self._draw_panel(template, rect, config)
+            self._overlay_cache.put(key, template)
+        return template.copy()
     
     def _draw_panel(self, overlay: Image.Image, rect: Tuple[int, int, int, int], config: Dict[str, Any]) -> None:
         panel_color = config["colors"]["panel"]
@@ -829,17 +1766,26 @@ class PamphletDesigner:
         
         shadow_strength = config.get("panel_shadow", 0)
         if shadow_strength > 0:
-            shadow_layer = Image.new("RGBA", overlay.size, (0, 0, 0, 0))
+            # Blur only the panel plus a margin wider than the blur's reach
+            # (3 sigma) instead of a full-canvas layer; outside it the
+            # shadow is fully transparent either way
+            blur_radius = 18
+            pad = blur_radius * 3
+            left, top = max(0, rect[0] - pad), max(0, rect[1] - pad)
+            right, bottom = min(overlay.width, rect[2] + pad), min(overlay.height, rect[3] + pad)
+            shadow_layer = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
             shadow_draw = ImageDraw.Draw(shadow_layer)
             shadow_alpha = int(min(180, shadow_strength * 2.2))
-            shadow_draw.rounded_rectangle(rect, radius=radius, fill=(0, 0, 0, shadow_alpha))
-            blurred_shadow = shadow_layer.filter(ImageFilter.GaussianBlur(radius=18))
-            overlay.alpha_composite(blurred_shadow)
+            local_rect = (rect[0] - left, rect[1] - top, rect[2] - left, rect[3] - top)
+            shadow_draw.rounded_rectangle(local_rect, radius=radius, fill=(0, 0, 0, shadow_alpha))
+            blurred_shadow = shadow_layer.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+            overlay.alpha_composite(blurred_shadow, dest=(left, top))
         
         draw.rounded_rectangle(rect, radius=radius, fill=rgba)
     
     def _draw_text_line(
         self,
+        overlay: Image.Image,
         draw: ImageDraw.ImageDraw,
         text: str,
         font: ImageFont.FreeTypeFont,
@@ -852,7 +1798,7 @@ class PamphletDesigner:
             return context[1]
         
         x_start, y_pos, width_available = context
-        bbox = font.getbbox(text)
+        bbox = _text_bbox(font, text)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         
@@ -864,10 +1810,17 @@ class PamphletDesigner:
             x = x_start + (width_available - text_width) // 2
         
         if shadow_intensity > 0:
+            # Rasterise the glyphs once into a coverage mask and paste the
+            # shadow copies and the text itself through it; same pixels as
+            # four draw.text calls with a single FreeType pass
             shadow_alpha = int(min(200, shadow_intensity * 2.4))
-            shadow_color = (0, 0, 0, shadow_alpha)
+            ox, oy = max(0, -bbox[0]), max(0, -bbox[1])
+            mask = Image.new("L", (bbox[2] + ox, bbox[3] + oy), 0)
+            ImageDraw.Draw(mask).text((ox, oy), text, font=font, fill=255)
             for dx, dy in [(-2, 2), (2, 2), (0, 3)]:
-                draw.text((x + dx, y_pos + dy), text, font=font, fill=shadow_color)
+                overlay.paste((0, 0, 0, shadow_alpha), (x + dx - ox, y_pos + dy - oy), mask)
+            overlay.paste((*color, 255), (x - ox, y_pos - oy), mask)
+            return y_pos + text_height
         
         draw.text((x, y_pos), text, font=font, fill=(*color, 255))
         return y_pos + text_height
@@ -883,7 +1836,7 @@ class PamphletDesigner:
         align: str,
     ) -> None:
         x_start, y_pos, width_available = context
-        bbox = font.getbbox(text)
+        bbox = _text_bbox(font, text)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         padding_x, padding_y = config.get("cta_padding", (30, 18))
@@ -903,19 +1856,11 @@ class PamphletDesigner:
         # Optional drop shadow
         shadow_intensity = config.get("cta_shadow", 0)
         if shadow_intensity > 0:
-            shadow = Image.new("RGBA", (box_width, box_height), (0, 0, 0, int(1.5 * shadow_intensity)))
-            shadow = shadow.filter(ImageFilter.GaussianBlur(radius=6))
+            shadow = self._cta_shadow((box_width, box_height), int(1.5 * shadow_intensity))
             overlay.paste(shadow, (box_x + 3, box_y + 6), shadow)
         
-        mask = Image.new("L", (box_width, box_height), 0)
-        mask_draw = ImageDraw.Draw(mask)
         radius = max(18, config.get("border_radius", 12))
-        mask_draw.rounded_rectangle(
-            [(0, 0), (box_width, box_height)],
-            radius=radius,
-            fill=255,
-        )
-        overlay.paste(cta_bg, (box_x, box_y), mask)
+        overlay.paste(cta_bg, (box_x, box_y), self._rounded_mask((box_width, box_height), radius))
         
         text_x = box_x + (box_width - text_width) // 2
         text_y = box_y + (box_height - text_height) // 2
@@ -926,7 +1871,7 @@ class PamphletDesigner:
             fill=(*config["colors"]["cta_text"], 255),
         )
 
-    def _estimate_content_height(
+    def _plan_text_layout(
         self,
         text_content: Dict[str, str],
         fonts: Dict[str, ImageFont.FreeTypeFont],
@@ -934,13 +1879,17 @@ class PamphletDesigner:
         features: List[str],
         removals: Optional[Dict[str, bool]] = None,
         custom_lines: Optional[List[str]] = None,
-    ) -> int:
+    ) -> Tuple[int, List[str]]:
         """
         Lightweight height estimator so we can anchor text vertically (top/middle/bottom)
         without rendering twice. This keeps edits predictable for users who want the
         text block positioned above the image focal point.
+
+        Returns `(estimated_height, description_lines)`; the renderer draws the
+        wrapped description from here rather than wrapping it a second time.
         """
         height = 0
+        wrapped: List[str] = []
         removals = removals or {}
         custom_lines = custom_lines or []
 
@@ -950,20 +1899,20 @@ class PamphletDesigner:
 
         headline = (text_content or {}).get("headline", "").strip()
         if headline and not removals.get("headline"):
-            hb = fonts["headline"].getbbox(headline)
+            hb = _text_bbox(fonts["headline"], headline)
             add(hb[3] - hb[1])
             height += int(fonts["headline"].size * 0.08)
 
         tagline = (text_content or {}).get("tagline", "").strip()
         if tagline and not removals.get("tagline"):
-            tb = fonts["tagline"].getbbox(tagline)
+            tb = _text_bbox(fonts["tagline"], tagline)
             add(tb[3] - tb[1])
             height += int(fonts["tagline"].size * 0.4)
 
         description = (text_content or {}).get("description", "").strip()
         if description and not removals.get("description"):
             wrapped = self._wrap_text(description, fonts["body"], text_area_width)
-            bb = fonts["body"].getbbox("Hg")
+            bb = _text_bbox(fonts["body"], "Hg")
             per_line = bb[3] - bb[1]
             add(len(wrapped) * per_line)
             height += len(wrapped) * int(fonts["body"].size * 0.15)
@@ -971,87 +1920,117 @@ class PamphletDesigner:
 
         if features:
             height += int(fonts["body"].size * 0.4)
-            title_bb = fonts["tagline"].getbbox("KEY FEATURES")
+            title_bb = _text_bbox(fonts["tagline"], "KEY FEATURES")
             add(title_bb[3] - title_bb[1])
             height += int(fonts["feature"].size * 0.4)
-            feature_bb = fonts["feature"].getbbox("• Sample feature")
+            feature_bb = _text_bbox(fonts["feature"], "• Sample feature")
             add(len(features[:4]) * (feature_bb[3] - feature_bb[1]))
             height += len(features[:4]) * int(fonts["feature"].size * 0.3)
             height += int(fonts["body"].size * 0.4)
 
         cta = (text_content or {}).get("call_to_action", "").strip()
         if cta and not removals.get("call_to_action"):
-            cta_bb = fonts["cta"].getbbox(cta.upper())
+            cta_bb = _text_bbox(fonts["cta"], cta.upper())
             add(cta_bb[3] - cta_bb[1])
             height += int(fonts["cta"].size * 0.8)
 
         if custom_lines and not removals.get("custom"):
-            bb = fonts["body"].getbbox("Hg")
+            bb = _text_bbox(fonts["body"], "Hg")
             per_line = bb[3] - bb[1]
             add(len(custom_lines) * per_line)
             height += len(custom_lines) * int(fonts["body"].size * 0.2)
 
-        return max(1, height)
+        return max(1, height), wrapped
     
     def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
-        words = text.split()
+        """
+        Greedy word wrap in one pass: each word is measured once and the line
+        width is a running sum of word and space advances, instead of
+        re-measuring the whole line every time a word is added.
+        """
+        space_width = _text_length(font, " ")
         lines: List[str] = []
         current_line: List[str] = []
+        current_width = 0.0
         
-        for word in words:
-            test_line = " ".join(current_line + [word])
-            try:
-                text_width = font.getlength(test_line)
-            except AttributeError:
-                bbox = font.getbbox(test_line)
-                text_width = bbox[2] - bbox[0]
-            if text_width <= max_width:
+        for word in text.split():
+            word_width = _text_length(font, word)
+            if not current_line:
+                if word_width > max_width:
+                    # An over-long word gets a line of its own
+                    lines.append(word)
+                else:
+                    current_line = [word]
+                    current_width = word_width
+                continue
+            if current_width + space_width + word_width <= max_width:
                 current_line.append(word)
+                current_width += space_width + word_width
             else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                    current_line = [word]
-                else:
+                lines.append(" ".join(current_line))
+                if word_width > max_width:
                     lines.append(word)
+                    current_line, current_width = [], 0.0
+                else:
+                    current_line, current_width = [word], word_width
         
         if current_line:
             lines.append(" ".join(current_line))
         return lines
     
     def _load_font(self, font_key: str, size: int) -> ImageFont.FreeTypeFont:
-        candidates = self.font_candidates.get(font_key, [])
-        for candidate in candidates:
-            try:
-                return ImageFont.truetype(candidate, size)
-            except (OSError, IOError):
-                continue
-        return ImageFont.load_default()
+        return _cached_font(font_key, size)
     
     def _parse_color(self, color_value: Any, default: Tuple[int, int, int]) -> Tuple[int, int, int]:
         if isinstance(color_value, (list, tuple)) and len(color_value) >= 3:
             return tuple(int(c) for c in color_value[:3])
         if isinstance(color_value, str):
-            value = color_value.strip().lstrip("#")
-            if len(value) == 6:
-                try:
-                    r = int(value[0:2], 16)
-                    g = int(value[2:4], 16)
-                    b = int(value[4:6], 16)
-                    return (r, g, b)
-                except ValueError:
-                    pass
+            return _parse_hex_color(color_value, default)
         return default
     
     def _apply_border_radius(self, image: Image.Image, radius: int) -> Image.Image:
         if radius <= 0:
             return image
+        width, height = image.size
         radius = min(radius, min(image.size) // 2)
-        rounded = Image.new("RGBA", image.size, (0, 0, 0, 0))
-        mask = Image.new("L", image.size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.rounded_rectangle([(0, 0), image.size], radius=radius, fill=255)
-        rounded.paste(image, (0, 0), mask)
-        return rounded
+        if radius > min(image.size) // 4:
+            rounded = Image.new("RGBA", image.size, (0, 0, 0, 0))
+            rounded.paste(image, (0, 0), self._rounded_mask(image.size, radius))
+            return rounded
+        # Only the four corners change: round them in place on radius-sized
+        # tiles instead of pasting the whole canvas through a full-size mask
+        mask = self._rounded_mask((radius * 2, radius * 2), radius)
+        clear = Image.new("RGBA", (radius, radius), (0, 0, 0, 0))
+        for x, y in ((0, 0), (width - radius, 0), (0, height - radius), (width - radius, height - radius)):
+            mx = 0 if x == 0 else radius
+            my = 0 if y == 0 else radius
+            corner = clear.copy()
+            corner.paste(
+                image.crop((x, y, x + radius, y + radius)),
+                (0, 0),
+                mask.crop((mx, my, mx + radius, my + radius)),
+            )
+            image.paste(corner, (x, y))
+        return image
+    
+    def _rounded_mask(self, size: Tuple[int, int], radius: int) -> Image.Image:
+        """Cached L mask of a rounded rectangle filling `size`; treat as read-only."""
+        key = (size, radius)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = Image.new("L", size, 0)
+            ImageDraw.Draw(mask).rounded_rectangle([(0, 0), size], radius=radius, fill=255)
+            self._mask_cache.put(key, mask)
+        return mask
+    
+    def _cta_shadow(self, size: Tuple[int, int], alpha: int) -> Image.Image:
+        """Cached blurred RGBA drop shadow for a CTA box of `size`; treat as read-only."""
+        key = (size, alpha)
+        shadow = self._shadow_cache.get(key)
+        if shadow is None:
+            shadow = Image.new("RGBA", size, (0, 0, 0, alpha)).filter(ImageFilter.GaussianBlur(radius=6))
+            self._shadow_cache.put(key, shadow)
+        return shadow
     
     def _fit_with_position(
         self,
@@ -1071,41 +2050,63 @@ class PamphletDesigner:
     
     def _apply_image_filter(self, image: Image.Image, filter_type: str, intensity: int) -> Image.Image:
         intensity = max(0, min(100, intensity))
+        if filter_type in ("brightness", "contrast", "saturate"):
+            from PIL import ImageEnhance
+
+            # ImageEnhance carries an alpha band through unchanged, so enhance
+            # the RGBA canvas directly instead of round-tripping through RGB
+            # (which also reset any transparency to opaque)
+            base = image if image.mode in ("RGB", "RGBA") else image.convert("RGBA")
         if filter_type == "brightness":
-            base = image.convert("RGB")
             enhancer = ImageEnhance.Brightness(base)
-            return enhancer.enhance(1 + (intensity - 50) / 70).convert("RGBA")
+            return enhancer.enhance(1 + (intensity - 50) / 70)
         if filter_type == "contrast":
-            base = image.convert("RGB")
             enhancer = ImageEnhance.Contrast(base)
-            return enhancer.enhance(1 + (intensity - 50) / 70).convert("RGBA")
+            return enhancer.enhance(1 + (intensity - 50) / 70)
         if filter_type == "saturate":
-            base = image.convert("RGB")
             enhancer = ImageEnhance.Color(base)
-            return enhancer.enhance(1 + (intensity - 50) / 65).convert("RGBA")
+            return enhancer.enhance(1 + (intensity - 50) / 65)
         if filter_type == "blur":
             blur_radius = max(0.1, intensity / 20)
             return image.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+        # Sepia and grayscale come out opaque; RGB input stays RGB
+        out_mode = "RGB" if image.mode == "RGB" else "RGBA"
         if filter_type == "sepia":
-            sepia = image.convert("RGB")
-            width, height = sepia.size
-            pixels = sepia.load()
-            for py in range(height):
-                for px in range(width):
-                    r, g, b = pixels[px, py]
-                    tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-                    tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-                    tb = int(0.272 * r + 0.534 * g + 0.131 * b)
-                    pixels[px, py] = (
-                        min(255, tr),
-                        min(255, tg),
-                        min(255, tb),
-                    )
-            return sepia.convert("RGBA")
+            src = np.asarray(image if image.mode == "RGB" else image.convert("RGB"))
+            if self.use_opencv:
+                import cv2
+
+                out = cv2.transform(src, np.array(SEPIA_WEIGHTS))
+                return Image.fromarray(out, "RGB").convert(out_mode)
+            kernel = _sepia_kernel()
+            if kernel is not None:
+                out = np.empty_like(src)
+                kernel(src, out)
+            else:
+                out = _sepia_numpy(src)
+            return Image.fromarray(out, "RGB").convert(out_mode)
         if filter_type == "grayscale":
-            return image.convert("L").convert("RGBA")
+            return image.convert("L").convert(out_mode)
         return image
     
+    def _scale_brightness(self, image: Image.Image, factor: float) -> Image.Image:
+        """Scale RGB by `factor` in one NumPy pass, keeping the alpha channel (if any)."""
+        mode = "RGB" if image.mode == "RGB" else "RGBA"
+        arr = np.asarray(image if image.mode == mode else image.convert(mode))
+        if self.use_opencv:
+            import cv2
+
+            # Saturating multiply in one pass; the 1.0 leaves alpha untouched
+            return Image.fromarray(cv2.multiply(arr, (factor, factor, factor, 1.0)), mode)
+        rgb = arr[..., :3].astype(np.float32)
+        rgb *= factor
+        np.clip(rgb, 0, 255, out=rgb)
+        out = np.empty_like(arr)
+        out[..., :3] = rgb
+        if mode == "RGBA":
+            out[..., 3] = arr[..., 3]
+        return Image.fromarray(out, mode)
+    
     def _apply_cropping(self, image: Image.Image, crop_type: str) -> Image.Image:
         width, height = image.size
         if crop_type == "square":
@@ -1142,7 +2143,7 @@ class LayoutFormattingAgent:
 
     def render(
         self,
-        image_data: bytes,
+        image_data: Union[bytes, Image.Image],
         text_content: Dict[str, str],
         request: PamphletRequest,
         enable_panel: bool = False,
@@ -1208,30 +2209,67 @@ class PamphletAgent:
         self,
         stability_api_key: str,
         ollama_model: str = "llama3.2",
+        text_backend: Optional[OllamaTextGenerator] = None,
         enable_text_generation_agent: bool = True,
         enable_content_editing_agent: bool = True,
         enable_layout_formatting_agent: bool = True,
         enable_review_agent: bool = True,
+        session: Optional[requests.Session] = None,
+        use_opencv: bool = False,
+        stage_workers: int = 32,
     ):
         # Core backends
-        self.text_backend = OllamaTextGenerator(ollama_model)
-        self.image_generator = StableDiffusionGenerator(stability_api_key)
-        self.designer = PamphletDesigner()
+        self.text_backend = text_backend or OllamaTextGenerator(ollama_model)
+        self.image_generator = StableDiffusionGenerator(stability_api_key, session=session)
+        self.designer = PamphletDesigner(use_opencv=use_opencv)
 
         # High-level agents
         self.text_agent = TextGenerationAgent(self.text_backend) if enable_text_generation_agent else None
         self.content_editing_agent = ContentEditingAgent() if enable_content_editing_agent else None
         self.layout_agent = LayoutFormattingAgent(self.designer) if enable_layout_formatting_agent else None
         self.review_agent = PamphletReviewAgent() if enable_review_agent else None
+
+        # Decoded edit sources keyed by content hash; repeated "apply" clicks
+        # on the same upload skip the PNG decode entirely
+        self._decoded_images = _LRUCache(maxsize=16)
+
+        # Runs the background image request alongside text generation. One
+        # agent serves every request thread of a process (gunicorn runs 8),
+        # and each in-flight generation holds a worker for its Stability call,
+        # so the limit must cover the server's request concurrency; threads
+        # are only started on demand, so an unused limit costs nothing
+        self._stage_pool = ThreadPoolExecutor(max_workers=stage_workers, thread_name_prefix="pamphlet-stage")
+        # Background saves get their own workers so a write never queues
+        # behind other requests' Stability calls (up to a minute each); a
+        # /download on another gunicorn worker process can only find the
+        # file once it is on disk
+        self._save_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pamphlet-save")
     
-    def generate_pamphlet(self, request: PamphletRequest) -> Dict[str, any]:
+    def generate_pamphlet(
+        self,
+        request: PamphletRequest,
+        precomputed_text: Optional[Dict[str, str]] = None,
+        persist: bool = True,
+        output_dir: Optional[str] = None,
+        filename: Optional[str] = None,
+        background_save: bool = False,
+    ) -> Dict[str, any]:
         """
         Generate a complete pamphlet by orchestrating the specialized agents.
 
+        When `precomputed_text` is given (e.g. a cache hit from
+        TextGenerationAgent), step 1 is skipped and no Ollama call is made.
+        The rendered PNG is returned as `image_bytes`; with `persist=False`
+        it is not written to disk at all. Otherwise it is saved as `filename`
+        (default `pamphlet_<product>.png`) inside `output_dir` (default CWD);
+        with `background_save=True` that write happens on the save pool and
+        the call returns without waiting for the disk (`close()` flushes it).
+
         Pipeline:
         1. TextGenerationAgent   → create base content with Ollama.
         2. ContentEditingAgent   → clean up and shorten for layout.
-        3. StableDiffusionGenerator → generate background image (Stability AI).
+        3. StableDiffusionGenerator → generate background image (Stability AI),
+           concurrently with steps 1-2 since it only needs the request.
         4. LayoutFormattingAgent → place text cleanly over the image.
         5. PamphletReviewAgent   → validate the final rendering (non-invasive).
         """
@@ -1240,21 +2278,29 @@ class PamphletAgent:
         if request.regeneration_index:
             print(f"♻️ Regeneration iteration detected: #{request.regeneration_index}")
         
+        # Step 3 does not depend on the text, so start the Stability AI call
+        # first and let it overlap with the Ollama round-trips below
+        print("🎨 Generating background image with Stable Diffusion...")
+        image_future = self._stage_pool.submit(self.image_generator.generate_pamphlet_image, request)
+        
         # Step 1: Generate text content (fallback to direct backend if disabled)
-        print("📝 Generating text content with TextGenerationAgent/Ollama...")
-        if self.text_agent is not None:
-            text_content = self.text_agent.generate(request)
+        if precomputed_text is not None:
+            print("♻️ Reusing cached text content, skipping Ollama...")
+            text_content, from_model = dict(precomputed_text), True
+        elif self.text_agent is not None:
+            print("📝 Generating text content with TextGenerationAgent/Ollama...")
+            text_content, from_model = self.text_agent.generate_checked(request)
         else:
-            text_content = self.text_backend.generate_pamphlet_text(request)
+            print("📝 Generating text content with TextGenerationAgent/Ollama...")
+            text_content, from_model = self.text_backend.generate_pamphlet_text_checked(request)
         
         # Step 2: Edit content for tone and layout fit
         if self.content_editing_agent is not None:
             print("✏️  Refining content with ContentEditingAgent...")
             text_content = self.content_editing_agent.edit(text_content, request)
         
-        # Step 3: Generate background image using Stability AI
-        print("🎨 Generating background image with Stable Diffusion...")
-        image_data = self.image_generator.generate_pamphlet_image(request, text_content)
+        # Step 3: Wait for the background image
+        image_data = image_future.result()
         
         if not image_data:
             return {"error": "Failed to generate image"}
@@ -1278,45 +2324,148 @@ class PamphletAgent:
             )
         
         # Step 6: Save files
-        print("💾 Saving pamphlet...")
-        filename = f"pamphlet_{request.product_name.replace(' ', '_').lower()}.png"
-        with open(filename, 'wb') as f:
-            f.write(pamphlet_data)
+        filename = filename or f"pamphlet_{request.product_name.replace(' ', '_').lower()}.png"
+        if persist:
+            print("💾 Saving pamphlet...")
+            path = os.path.join(output_dir or "", filename)
+            if background_save:
+                self._save_pool.submit(self._write_file_logged, path, pamphlet_data)
+            else:
+                self._write_file(path, pamphlet_data)
         
         response: Dict[str, Any] = {
             "success": True,
             "filename": filename,
+            "image_bytes": pamphlet_data,
             "text_content": {
                 **text_content,
                 "features": request.key_features
             },
-            "layout_base_image": base64.b64encode(layout_base).decode("utf-8"),
+            "layout_base_image": b64encode_str(layout_base),
             "message": "Pamphlet generated successfully!",
+            # True when an Ollama call failed and placeholder copy was used;
+            # such pamphlets should not be cached
+            "text_fallback": not from_model,
         }
         if review_metadata is not None:
             response["review"] = review_metadata
         return response
     
-    def edit_pamphlet(self, original_image_data: bytes, edits: Dict, text_content: Optional[Dict[str, str]] = None) -> Optional[bytes]:
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    @classmethod
+    def _write_file_logged(cls, path: str, data: bytes) -> None:
+        # Background saves have no caller to raise to, so report failures here
+        try:
+            cls._write_file(path, data)
+        except OSError as e:
+            print(f"Error saving pamphlet to {path}: {e}")
+
+    def reset_connections(self) -> None:
+        """Close pooled HTTP connections (e.g. after a fork); sessions stay usable."""
+        self.text_backend.session.close()
+        self.image_generator.session.close()
+
+    def close(self) -> None:
+        """Tear down worker threads and every pooled connection (sync and async)."""
+        self._stage_pool.shutdown(wait=True)
+        self._save_pool.shutdown(wait=True)
+        self.text_backend.close()
+        self.image_generator.close()
+
+    def edit_pamphlet(
+        self,
+        original_image_data: Union[bytes, Image.Image],
+        edits: Dict,
+        text_content: Optional[Dict[str, str]] = None,
+        png_compress_level: int = 1,
+    ) -> Optional[bytes]:
         """Edit an existing pamphlet with custom settings"""
         
         print("🎨 Editing pamphlet with custom settings...")
         
         try:
-            original_image = Image.open(io.BytesIO(original_image_data)).convert("RGBA")
+            original_image = self._decode_image(original_image_data)
             features = None
             if text_content and isinstance(text_content, dict):
                 features = text_content.get("features") or []
             edited_image, layout_base = self.designer.apply_edits(original_image, edits, text_content, features=features)
-            output = io.BytesIO()
-            edited_image.save(output, format="PNG", quality=95)
-            layout_output = io.BytesIO()
-            layout_base.save(layout_output, format="PNG", quality=95)
-            return output.getvalue(), layout_output.getvalue()
+            edited_bytes, layout_base_bytes = _encode_images(
+                (edited_image, self.designer.output_format),
+                (layout_base, "PNG"),
+                png_compress_level=png_compress_level,
+            )
+            return edited_bytes, layout_base_bytes
         except Exception as e:
             print(f"Error editing pamphlet: {e}")
             return None
 
+    def edit_pamphlet_batch(
+        self,
+        original_image_data: Union[bytes, Image.Image],
+        edits_list: List[Dict],
+        text_content: Optional[Dict[str, str]] = None,
+        png_compress_level: int = 1,
+    ) -> Optional[List[Tuple[bytes, bytes]]]:
+        """
+        Apply several edit sets to one pamphlet: one decode, shared background
+        work for sets with the same image settings, and one render/encode per
+        distinct set. Returns `(edited, layout_base)` bytes in input order.
+        """
+        print(f"🎨 Editing pamphlet with {len(edits_list)} custom setting sets...")
+        
+        try:
+            original_image = self._decode_image(original_image_data)
+            features = None
+            if text_content and isinstance(text_content, dict):
+                features = text_content.get("features") or []
+            rendered = self.designer.apply_edits_batch(original_image, edits_list, text_content, features=features)
+            # Duplicate edit sets come back as the same image objects
+            encoded: Dict[int, Tuple[bytes, bytes]] = {}
+            results = []
+            for edited_image, layout_base in rendered:
+                key = id(edited_image)
+                if key not in encoded:
+                    edited_bytes, layout_base_bytes = _encode_images(
+                        (edited_image, self.designer.output_format),
+                        (layout_base, "PNG"),
+                        png_compress_level=png_compress_level,
+                    )
+                    encoded[key] = (edited_bytes, layout_base_bytes)
+                results.append(encoded[key])
+            return results
+        except Exception as e:
+            print(f"Error editing pamphlet: {e}")
+            return None
+
+    def _decode_image(self, image_data: Union[bytes, Image.Image]) -> Image.Image:
+        """Decode image bytes to RGB/RGBA, reusing the result for identical uploads.
+
+        Opaque RGB pamphlets are kept as RGB (see `PamphletDesigner._edit_source`);
+        other modes are converted to RGBA. Callers that already hold the
+        decoded pamphlet may pass the image itself, which skips hashing and
+        decoding the bytes.
+
+        Cached images are shared between calls and must not be mutated;
+        `PamphletDesigner.apply_edits` only reads them (its first resize
+        always produces a new image).
+        """
+        if isinstance(image_data, Image.Image):
+            return image_data if image_data.mode in ("RGB", "RGBA") else image_data.convert("RGBA")
+        digest = hashlib.blake2b(image_data, digest_size=16).digest()
+        image = self._decoded_images.get(digest)
+        if image is None:
+            image = Image.open(io.BytesIO(image_data))
+            if image.mode in ("RGB", "RGBA"):
+                image.load()
+            else:
+                image = image.convert("RGBA")
+            self._decoded_images.put(digest, image)
+        return image
+
 def main():
     """Example usage"""
     # Replace with your actual API key
@@ -3,22 +3,58 @@
 Test script for pamphlet editing features
 """
 
-import requests
-import base64
-import json
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+
+import pytest
 from PIL import Image
 from pamphlet_agent import PamphletAgent, PamphletRequest, PamphletDesigner
 
-def test_editing_features():
-    """Test the new editing features"""
-    
-    print("🧪 Testing Pamphlet Editing Features...")
-    
-    # Initialize the agent
-    STABILITY_API_KEY = "sk-a3ebXgGIjvAnJEr70JyP1iIMiGZlsoEz23C2tkrDu2MuefKY"
-    agent = PamphletAgent(STABILITY_API_KEY)
-    
+# Built once per run: the agent's HTTP pools and the designer's fonts are
+# reused by every test instead of being set up again. Both stay on the
+# default (Pillow/NumPy) edit filters; the opt-in OpenCV path is checked
+# against them in test_opencv_filters_match_default.
+@functools.lru_cache(maxsize=1)
+def _designer():
+    return PamphletDesigner()
+
+@functools.lru_cache(maxsize=None)
+def _agent(api_key):
+    return PamphletAgent(api_key)
+
+# Read from the environment like app.py; tests that need it skip when unset
+STABILITY_API_KEY = os.environ.get("STABILITY_API_KEY")
+
+# Edit scenarios, shared by the pytest cases and the script run
+TEST_EDITS = [
+    {
+        "name": "Size Change",
+        "edits": {
+            "size": {"width": 800, "height": 1000},
+            "overallBrightness": 120
+        }
+    },
+    {
+        "name": "Filter Application",
+        "edits": {
+            "imageFilter": "sepia",
+            "filterIntensity": 80,
+            "borderRadius": 25
+        }
+    },
+    {
+        "name": "Cropping Test",
+        "edits": {
+            "imageCrop": "square",
+            "backgroundOpacity": 60
+        }
+    }
+]
+
+def _generate_original(agent):
+    """Generate the pamphlet the edits start from; returns its bytes or None."""
     # Create a test pamphlet request
     request = PamphletRequest(
         product_name="Test Product",
@@ -38,71 +74,107 @@ def test_editing_features():
     
     print("📝 Generating test pamphlet...")
     result = agent.generate_pamphlet(request)
+    if not result.get('success'):
+        print(f"❌ Failed to generate test pamphlet: {result.get('error')}")
+        return None
+    print(f"✅ Pamphlet generated: {result['filename']}")
     
-    if result.get('success'):
-        print(f"✅ Pamphlet generated: {result['filename']}")
-        
-        # Test editing features
-        print("🎨 Testing editing features...")
-        
-        # Read the generated image
+    # Use the rendered bytes from the result; only older agents without
+    # `image_bytes` need the file read back from disk
+    original_image_data = result.get('image_bytes')
+    if original_image_data is None:
         with open(result['filename'], 'rb') as f:
             original_image_data = f.read()
-        
-        # Test different edit scenarios
-        test_edits = [
-            {
-                "name": "Size Change",
-                "edits": {
-                    "size": {"width": 800, "height": 1000},
-                    "overallBrightness": 120
-                }
-            },
-            {
-                "name": "Filter Application",
-                "edits": {
-                    "imageFilter": "sepia",
-                    "filterIntensity": 80,
-                    "borderRadius": 25
-                }
-            },
-            {
-                "name": "Cropping Test",
-                "edits": {
-                    "imageCrop": "square",
-                    "backgroundOpacity": 60
-                }
-            }
-        ]
-        
-        for test in test_edits:
-            print(f"🔧 Testing: {test['name']}")
-            
-            edited_result = agent.edit_pamphlet(original_image_data, test['edits'])
-            
-            if edited_result:
-                edited_data, layout_base = edited_result
-                filename = f"test_{test['name'].lower().replace(' ', '_')}.png"
-                with open(filename, 'wb') as f:
-                    f.write(edited_data)
-                base_filename = f"test_{test['name'].lower().replace(' ', '_')}_layout.png"
-                with open(base_filename, 'wb') as f:
-                    f.write(layout_base)
-                print(f"✅ {test['name']} test passed: {filename}")
-            else:
-                print(f"❌ {test['name']} test failed")
-        
-        print("\n🎉 All editing tests completed!")
-        print("📁 Check the generated files to see the results")
-        
-    else:
-        print(f"❌ Failed to generate test pamphlet: {result.get('error')}")
+    return original_image_data
+
+def _edit_outputs(name, edited_result):
+    """`(path, data)` pairs for an edit's pamphlet and its layout base, pamphlet first."""
+    edited_data, layout_base = edited_result
+    stem = f"test_{name.lower().replace(' ', '_')}"
+    return [(f"{stem}.png", edited_data), (f"{stem}_layout.png", layout_base)]
+
+def _save_edit(name, edited_result):
+    """Write an edit's pamphlet and layout base; returns the pamphlet filename."""
+    outputs = _edit_outputs(name, edited_result)
+    for path, data in outputs:
+        Path(path).write_bytes(data)
+    return outputs[0][0]
+
+# Module-scoped so every scenario (and every xdist worker's share of them)
+# reuses one agent and one generated pamphlet
+@pytest.fixture(scope="module")
+def agent():
+    if not STABILITY_API_KEY:
+        pytest.skip("STABILITY_API_KEY environment variable not set")
+    return _agent(STABILITY_API_KEY)
+
+@pytest.fixture(scope="module")
+def original_image_data(agent):
+    data = _generate_original(agent)
+    if data is None:
+        pytest.skip("test pamphlet could not be generated")
+    return data
 
-def test_offline_layout_engine():
+@pytest.mark.parametrize("name,edits", [(test["name"], test["edits"]) for test in TEST_EDITS])
+def test_edit_scenario(agent, original_image_data, name, edits):
+    """Apply one edit scenario to the generated pamphlet"""
+    print(f"🔧 Testing: {name}")
+    edited_result = agent.edit_pamphlet(original_image_data, edits)
+    assert edited_result, f"{name} test failed"
+    filename = _save_edit(name, edited_result)
+    print(f"✅ {name} test passed: {filename}")
+
+def run_editing_features():
+    """Script run: generate once, then apply every scenario in one batch"""
+    
+    print("🧪 Testing Pamphlet Editing Features...")
+    
+    if not STABILITY_API_KEY:
+        print("⚠️  WARNING: Please set the STABILITY_API_KEY environment variable")
+        return
+    agent = _agent(STABILITY_API_KEY)
+    original_image_data = _generate_original(agent)
+    if original_image_data is None:
+        return
+    
+    # Test editing features
+    print("🎨 Testing editing features...")
+    
+    # One batch call: a single decode, with shared background work for
+    # scenarios that use the same image settings
+    for test in TEST_EDITS:
+        print(f"🔧 Testing: {test['name']}")
+    edited_results = agent.edit_pamphlet_batch(original_image_data, [test['edits'] for test in TEST_EDITS])
+    
+    outcomes = list(zip(TEST_EDITS, edited_results or [None] * len(TEST_EDITS)))
+    
+    # Write every output file at once; file writes release the GIL, so
+    # they overlap instead of queueing one after another
+    to_write = [
+        output
+        for test, edited_result in outcomes if edited_result
+        for output in _edit_outputs(test['name'], edited_result)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, len(to_write))) as executor:
+        # list() so a failed write raises here
+        list(executor.map(lambda output: Path(output[0]).write_bytes(output[1]), to_write))
+    
+    for test, edited_result in outcomes:
+        if edited_result:
+            filename = _edit_outputs(test['name'], edited_result)[0][0]
+            print(f"✅ {test['name']} test passed: {filename}")
+        else:
+            print(f"❌ {test['name']} test failed")
+    
+    print("\n🎉 All editing tests completed!")
+    print("📁 Check the generated files to see the results")
+
+def test_offline_layout_engine(tmp_path):
     """Validate the layout engine without hitting external APIs."""
     print("\n🧪 Testing offline layout engine rendering...")
-    designer = PamphletDesigner()
-    canvas = Image.new("RGBA", (1200, 1600), (42, 98, 156, 255))
+    designer = _designer()
+    # Opaque, so RGB: the edit pipeline only adds alpha when composing
+    canvas = Image.new("RGB", (1200, 1600), (42, 98, 156))
     
     mock_edits = {
         "size": {"width": 1200, "height": 1600},
@@ -141,14 +213,42 @@ def test_offline_layout_engine():
     ]
     
     final_canvas, layout_base = designer.apply_edits(canvas, mock_edits, text_content, features=features)
-    output_dir = Path("test_outputs")
-    output_dir.mkdir(exist_ok=True)
-    offline_path = output_dir / "offline_layout_preview.png"
-    final_canvas.save(offline_path, format="PNG")
-    layout_path = output_dir / "offline_layout_base.png"
-    layout_base.save(layout_path, format="PNG")
+    assert final_canvas.mode == layout_base.mode == "RGB"
+    assert final_canvas.size == layout_base.size == (1200, 1600)
+    assert layout_base.getbbox() is not None, "layout base is empty"
+    assert final_canvas.tobytes() != layout_base.tobytes(), "no text was rendered"
+    
+    offline_path = tmp_path / "offline_layout_preview.png"
+    layout_path = tmp_path / "offline_layout_base.png"
+    # Scratch previews: fast zlib level, size doesn't matter here
+    final_canvas.save(offline_path, format="PNG", compress_level=1)
+    layout_base.save(layout_path, format="PNG", compress_level=1)
     print(f"✅ Offline layout rendering saved to {offline_path.resolve()}")
 
+def test_opencv_filters_match_default():
+    """The opt-in OpenCV sepia/brightness path stays within 2 LSB of the default."""
+    pytest.importorskip("cv2")
+    import numpy as np
+    
+    rng = np.random.default_rng(0)
+    canvas = Image.fromarray((rng.random((800, 600, 3)) * 255).astype("uint8"))
+    text_content = {"headline": "OPENCV CHECK", "call_to_action": "Compare"}
+    default_designer, opencv_designer = _designer(), PamphletDesigner(use_opencv=True)
+    for edits in (
+        {"imageFilter": "sepia", "filterIntensity": 80},
+        {"overallBrightness": 120},
+        {"overallBrightness": 70, "imageFilter": "sepia", "borderRadius": 25},
+    ):
+        expected = default_designer.apply_edits(canvas, edits, text_content)
+        actual = opencv_designer.apply_edits(canvas, edits, text_content)
+        for want, got in zip(expected, actual):
+            assert (got.mode, got.size) == (want.mode, want.size)
+            diff = np.abs(np.asarray(got, dtype=np.int16) - np.asarray(want, dtype=np.int16))
+            assert diff.max() <= 2, f"{edits}: OpenCV output differs by {diff.max()}"
+
 if __name__ == "__main__":
-    test_editing_features()
-    test_offline_layout_engine()
+    run_editing_features()
+    # Script runs keep the previews around for a look
+    preview_dir = Path("test_outputs")
+    preview_dir.mkdir(exist_ok=True)
+    test_offline_layout_engine(preview_dir)
@@ -4,39 +4,80 @@ Test script for AI Pamphlet Generator
 Tests the integration between Ollama and Stable Diffusion
 """
 
+import asyncio
 import requests
-import json
-import time
+import functools
+import httpx
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pamphlet_agent import PamphletAgent, PamphletRequest
 
+# One keep-alive pool for the agent's (sync) Stability calls, so repeated
+# requests skip the TCP/TLS handshake; the async probes use _async_client
+SESSION = requests.Session()
+for _prefix in ("http://", "https://"):
+    SESSION.mount(
+        _prefix,
+        HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=Retry(total=2, backoff_factor=0.3)),
+    )
+
+_print_lock = threading.Lock()
+
+def _print(*args, **kwargs):
+    """print() that is safe to call from the concurrently running probes."""
+    with _print_lock:
+        print(*args, **kwargs)
+
+def _async_client():
+    """Keep-alive httpx client for the async probes, retrying failed connects."""
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            retries=2,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=4),
+        )
+    )
+
+async def _with_client(probe, *args):
+    """Run one async probe with a client of its own."""
+    async with _async_client() as client:
+        return await probe(client, *args)
+
+@functools.lru_cache(maxsize=None)
+def _agent(api_key):
+    """One PamphletAgent per key, reused across checks."""
+    return PamphletAgent(api_key, session=SESSION)
+
 def test_ollama_connection():
     """Test if Ollama is running and accessible"""
-    print("🔍 Testing Ollama connection...")
+    return asyncio.run(_with_client(_probe_ollama_connection))
+
+async def _probe_ollama_connection(client):
+    _print("🔍 Testing Ollama connection...")
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = await client.get("http://localhost:11434/api/tags", timeout=5)
         if response.status_code == 200:
             models = response.json().get('models', [])
-            print(f"✅ Ollama is running with {len(models)} models")
+            _print(f"✅ Ollama is running with {len(models)} models")
             
             # Check if llama3.2 is available
-            model_names = [model['name'] for model in models]
-            if any('llama3.2' in name for name in model_names):
-                print("✅ Llama 3.2 model is available")
+            if any('llama3.2' in model['name'] for model in models):
+                _print("✅ Llama 3.2 model is available")
                 return True
             else:
-                print("⚠️  Llama 3.2 model not found, but Ollama is running")
+                _print("⚠️  Llama 3.2 model not found, but Ollama is running")
                 return True
         else:
-            print(f"❌ Ollama returned status code: {response.status_code}")
+            _print(f"❌ Ollama returned status code: {response.status_code}")
             return False
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Cannot connect to Ollama: {e}")
-        print("💡 Make sure Ollama is running: ollama serve")
+    except httpx.HTTPError as e:
+        _print(f"❌ Cannot connect to Ollama: {e}")
+        _print("💡 Make sure Ollama is running: ollama serve")
         return False
 
 def test_ollama_text_generation():
     """Test text generation with Ollama"""
-    print("\n📝 Testing Ollama text generation...")
+    _print("\n📝 Testing Ollama text generation...")
     try:
         from pamphlet_agent import OllamaTextGenerator
         
@@ -44,56 +85,61 @@ def test_ollama_text_generation():
         
         # Test simple generation
         test_prompt = "Write a short, catchy headline for a new eco-friendly cleaning product."
-        response = generator._call_ollama(test_prompt)
+        # Greedy decoding is deterministic, so warm runs are served from
+        # the on-disk completion cache (set OLLAMA_NO_CACHE=1 to bypass)
+        response = generator._call_ollama(test_prompt, temperature=0)
         
         if response and "Error" not in response:
-            print("✅ Ollama text generation working")
-            print(f"📄 Sample output: {response[:100]}...")
+            _print("✅ Ollama text generation working")
+            _print(f"📄 Sample output: {response[:100]}...")
             return True
         else:
-            print("❌ Ollama text generation failed")
+            _print("❌ Ollama text generation failed")
             return False
             
     except Exception as e:
-        print(f"❌ Error testing Ollama: {e}")
+        _print(f"❌ Error testing Ollama: {e}")
         return False
 
 def test_stability_api_connection(api_key):
     """Test Stability AI API connection"""
-    print("\n🎨 Testing Stability AI API connection...")
+    return asyncio.run(_with_client(_probe_stability_api_connection, api_key))
+
+async def _probe_stability_api_connection(client, api_key):
+    _print("\n🎨 Testing Stability AI API connection...")
     
     if not api_key or api_key == "your_stability_api_key_here":
-        print("⚠️  Stability AI API key not set")
-        print("💡 Please update the API key in app.py or .env file")
+        _print("⚠️  Stability AI API key not set")
+        _print("💡 Please update the API key in app.py or .env file")
         return False
     
     try:
-        url = "https://api.stability.ai/v2beta/stable-image/generate/core"
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "image/*"
-        }
+        headers = {"Authorization": f"Bearer {api_key}"}
         
-        # Test with a simple prompt
-        files = {
-            "prompt": (None, "A simple test image"),
-            "output_format": (None, "png"),
-            "aspect_ratio": (None, "1:1"),
-            "mode": (None, "text-to-image")
-        }
+        # The account endpoint checks the key without spending credits
+        response = await client.get("https://api.stability.ai/v1/user/account", headers=headers, timeout=5)
         
-        response = requests.post(url, headers=headers, files=files, timeout=30)
+        if response.status_code == 404:
+            # Account endpoint gone: fall back to a real (paid) generation
+            url = "https://api.stability.ai/v2beta/stable-image/generate/core"
+            files = {
+                "prompt": (None, "A simple test image"),
+                "output_format": (None, "png"),
+                "aspect_ratio": (None, "1:1"),
+                "mode": (None, "text-to-image")
+            }
+            response = await client.post(url, headers={**headers, "Accept": "image/*"}, files=files, timeout=30)
         
         if response.status_code == 200:
-            print("✅ Stability AI API connection successful")
+            _print("✅ Stability AI API connection successful")
             return True
         else:
-            print(f"❌ Stability AI API error: {response.status_code}")
-            print(f"Response: {response.text}")
+            _print(f"❌ Stability AI API error: {response.status_code}")
+            _print(f"Response: {response.text}")
             return False
             
     except Exception as e:
-        print(f"❌ Error testing Stability AI API: {e}")
+        _print(f"❌ Error testing Stability AI API: {e}")
         return False
 
 def test_complete_integration(api_key):
@@ -115,7 +161,7 @@ def test_complete_integration(api_key):
         
         # Create agent (only if API key is available)
         if api_key and api_key != "your_stability_api_key_here":
-            agent = PamphletAgent(api_key)
+            agent = _agent(api_key)
             
             print("⏳ Generating test pamphlet (this may take 1-2 minutes)...")
             result = agent.generate_pamphlet(test_request)
@@ -138,6 +184,19 @@ def test_complete_integration(api_key):
         print(f"❌ Error in complete integration test: {e}")
         return False
 
+async def _run_probes(api_key):
+    """
+    Tests 1-3 are independent, so overlap them on one event loop and one
+    keep-alive client. Text generation goes through OllamaTextGenerator's
+    own (sync) pool and on-disk cache, so it runs on a worker thread.
+    """
+    async with _async_client() as client:
+        return await asyncio.gather(
+            _probe_ollama_connection(client),
+            asyncio.to_thread(test_ollama_text_generation),
+            _probe_stability_api_connection(client, api_key),
+        )
+
 def main():
     """Run all tests"""
     print("🧪 AI Pamphlet Generator Integration Test")
@@ -147,21 +206,14 @@ def main():
     tests_passed = 0
     total_tests = 0
     
-    # Test 1: Ollama connection
-    total_tests += 1
-    if test_ollama_connection():
-        tests_passed += 1
-    
-    # Test 2: Ollama text generation
-    total_tests += 1
-    if test_ollama_text_generation():
-        tests_passed += 1
-    
-    # Test 3: Stability AI API (if key is available)
     api_key = "your_stability_api_key_here"  # This should be updated
-    total_tests += 1
-    if test_stability_api_connection(api_key):
-        tests_passed += 1
+    
+    # Tests 1-3: Ollama connection, Ollama text generation and Stability AI
+    # API (if key is available), probed concurrently
+    for passed in asyncio.run(_run_probes(api_key)):
+        total_tests += 1
+        if passed:
+            tests_passed += 1
     
     # Test 4: Complete integration
     total_tests += 1
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for BatchedTextGenerator's coalescing (no Ollama needed)
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from pamphlet_agent import BatchedTextGenerator
+
+def _generator(window=1.0, gate=None):
+    """BatchedTextGenerator whose Ollama round-trips are stubbed out.
+
+    Every dispatched call is recorded in `generator.calls`; with a `gate`,
+    the first call blocks until the gate is set, so it stays in flight.
+    """
+    generator = BatchedTextGenerator(window=window)
+    generator.calls = []
+
+    async def fake_generate_all(prompts, fields):
+        generator.calls.append(list(prompts))
+        if gate is not None and len(generator.calls) == 1:
+            await asyncio.get_running_loop().run_in_executor(None, gate.wait)
+        return [prompt.upper() for prompt in prompts]
+
+    generator._agenerate_all = fake_generate_all
+    return generator
+
+def test_lone_request_is_sent_directly():
+    """A single request skips batching and gets its responses in order"""
+    generator = _generator()
+    try:
+        assert generator._generate_all(["a", "b"], ["headline", "tagline"]) == ["A", "B"]
+        assert generator.calls == [["a", "b"]]
+    finally:
+        generator.close()
+
+def test_overlapping_request_does_not_wait_out_the_window():
+    """A request arriving while another is in flight is flushed at once"""
+    gate = threading.Event()
+    generator = _generator(window=2.0, gate=gate)
+    first = threading.Thread(target=generator._generate_all, args=(["first"],))
+    first.start()
+    try:
+        while not generator.calls:
+            time.sleep(0.01)
+        start = time.perf_counter()
+        assert generator._generate_all(["second"]) == ["SECOND"]
+        # Nothing else is joining, so the leader must not sit out the 2 s window
+        assert time.perf_counter() - start < 1.0
+    finally:
+        gate.set()
+        first.join()
+        generator.close()
+
+def test_batch_dedupes_prompts_and_fans_results_out():
+    """Identical (field, prompt) pairs are sent once and each caller gets its own answers"""
+    generator = _generator()
+    try:
+        batch = [
+            ([("headline", "x"), ("tagline", "y")], Future()),
+            ([("tagline", "y"), (None, "z")], Future()),
+            ([("headline", "x")], Future()),
+        ]
+        generator._flush(batch)
+        assert generator.calls == [["x", "y", "z"]]
+        assert [future.result() for _, future in batch] == [["X", "Y"], ["Y", "Z"], ["X"]]
+    finally:
+        generator.close()
+
+def test_batch_failure_reaches_every_caller():
+    """An exception from the batch call is raised for every waiting request"""
+    generator = _generator()
+
+    async def failing_generate_all(prompts, fields):
+        raise RuntimeError("ollama down")
+
+    generator._agenerate_all = failing_generate_all
+    try:
+        batch = [([(None, "a")], Future()), ([(None, "b")], Future())]
+        generator._flush(batch)
+        for _, future in batch:
+            with pytest.raises(RuntimeError, match="ollama down"):
+                future.result()
+    finally:
+        generator.close()
@@ -0,0 +1,23 @@
+"""
+Base64 helpers
+==============
+
+Encode/decode helpers for the multi-MB PNG payloads exchanged with the web app.
+`pybase64` (SIMD-accelerated libbase64) is used when installed; otherwise
+the standard library implementation is used with the same API.
+"""
+
+try:
+    import pybase64 as _base64
+except ImportError:  # pragma: no cover - optional speedup
+    import base64 as _base64
+
+
+def b64encode_str(data: bytes) -> str:
+    """Encode bytes as an ASCII base64 string."""
+    return _base64.b64encode(data).decode("ascii")
+
+
+def b64decode(data: "str | bytes") -> bytes:
+    """Decode a base64 string (or ASCII bytes) to raw bytes."""
+    return _base64.b64decode(data)